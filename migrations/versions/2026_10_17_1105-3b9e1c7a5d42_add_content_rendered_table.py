@@ -0,0 +1,44 @@
+"""add content_rendered table with pre-rendered leaf messages
+
+Revision ID: 3b9e1c7a5d42
+Revises: f92871bcd939
+Create Date: 2026-10-17 11:05:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1c7a5d42'
+down_revision: Union[str, None] = 'f92871bcd939'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        -- Leaf messages rendered once at sync time (render_leaf_message output)
+        CREATE TABLE IF NOT EXISTS public.content_rendered (
+            content_id       bigint PRIMARY KEY
+                REFERENCES public.content(id) ON DELETE CASCADE,
+            text_digest      bpchar(64) NOT NULL,              -- content.text_digest rendered
+            max_len          int4       NOT NULL,              -- chunk size used for splitting
+            breadcrumb_text  text       NOT NULL,              -- build_breadcrumb_text(chain)
+            complete_text    text       NOT NULL,              -- breadcrumb + first chunk
+            extra_chunks     text[]     NOT NULL DEFAULT '{}', -- remaining chunks, sent separately
+            rendered_at      timestamptz NOT NULL DEFAULT now()
+        );
+
+        CREATE INDEX IF NOT EXISTS content_rendered_text_digest_idx
+            ON public.content_rendered (text_digest);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        DROP TABLE IF EXISTS public.content_rendered;
+    """)
@@ -0,0 +1,55 @@
+"""add materialised path (ancestor ids) and depth to content
+
+Revision ID: 7c4e2a91b0d3
+Revises: 3b9e1c7a5d42
+Create Date: 2026-10-17 11:50:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4e2a91b0d3'
+down_revision: Union[str, None] = '3b9e1c7a5d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        -- ids from the root down to the row itself, written by the sync repository;
+        -- '{}' = not maintained (row written elsewhere) → readers fall back to parent_id recursion
+        ALTER TABLE public.content
+            ADD COLUMN IF NOT EXISTS path bigint[] NOT NULL DEFAULT '{}';
+
+        ALTER TABLE public.content
+            ADD COLUMN IF NOT EXISTS depth int4 GENERATED ALWAYS AS (cardinality(path) - 1) STORED;
+
+        WITH RECURSIVE p AS (
+            SELECT id, ARRAY[id]::bigint[] AS path FROM public.content WHERE parent_id IS NULL
+            UNION ALL
+            SELECT c.id, p.path || c.id
+              FROM public.content c
+              JOIN p ON c.parent_id = p.id
+             WHERE cardinality(p.path) < 64
+        )
+        UPDATE public.content SET path = p.path FROM p WHERE content.id = p.id;
+
+        -- subtree questions: path @> ARRAY[<ancestor id>]
+        CREATE INDEX IF NOT EXISTS content_path_gin_idx ON public.content USING gin (path);
+        -- children lookups (get_children, "is this a leaf") had no index on parent_id at all
+        CREATE INDEX IF NOT EXISTS content_parent_id_ord_idx ON public.content (parent_id, ord, id);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        DROP INDEX IF EXISTS public.content_parent_id_ord_idx;
+        DROP INDEX IF EXISTS public.content_path_gin_idx;
+        ALTER TABLE public.content DROP COLUMN IF EXISTS depth;
+        ALTER TABLE public.content DROP COLUMN IF EXISTS path;
+    """)
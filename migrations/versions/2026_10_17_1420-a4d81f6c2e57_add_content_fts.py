@@ -0,0 +1,46 @@
+"""add full-text search vector to content
+
+Revision ID: a4d81f6c2e57
+Revises: 7c4e2a91b0d3
+Create Date: 2026-10-17 14:20:11.384620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d81f6c2e57'
+down_revision: Union[str, None] = '7c4e2a91b0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        -- title (weight A) + body without HTML tags (weight B); the 'russian' configuration
+        -- stems Latin words with the English stemmer, so place names in both scripts match
+        ALTER TABLE public.content
+            ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('russian'::regconfig, coalesce(title, '')), 'A') ||
+                setweight(
+                    to_tsvector(
+                        'russian'::regconfig,
+                        regexp_replace(coalesce(body, ''), '<[^>]+>', ' ', 'g')
+                    ),
+                    'B'
+                )
+            ) STORED;
+
+        CREATE INDEX IF NOT EXISTS content_tsv_gin_idx ON public.content USING gin (tsv);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        DROP INDEX IF EXISTS public.content_tsv_gin_idx;
+        ALTER TABLE public.content DROP COLUMN IF EXISTS tsv;
+    """)
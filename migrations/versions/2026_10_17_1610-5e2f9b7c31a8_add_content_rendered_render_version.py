@@ -0,0 +1,34 @@
+"""add renderer version to content_rendered
+
+Revision ID: 5e2f9b7c31a8
+Revises: a4d81f6c2e57
+Create Date: 2026-10-17 16:10:42.907215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2f9b7c31a8'
+down_revision: Union[str, None] = 'a4d81f6c2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        -- src.content.renderer.RENDER_VERSION a row was rendered with; rows written before this
+        -- column existed get 0, which never matches, so the next sync re-renders them
+        ALTER TABLE public.content_rendered
+            ADD COLUMN IF NOT EXISTS render_version int4 NOT NULL DEFAULT 0;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        ALTER TABLE public.content_rendered DROP COLUMN IF EXISTS render_version;
+    """)
@@ -11,7 +11,8 @@ from aiogram.types import (
     ChatMemberUpdated, ShippingQuery, PreCheckoutQuery, PollAnswer
 )
 
-from src.bot.content_dao import get_content, get_breadcrumb
+from src.bot.cache_layer import get_breadcrumb_cached, get_content_cached
+from src.bot.callbacks import Action, Callback
 from src.tools.utils.utils_hash import digest
 from .context import CURRENT_ACTIVITY_ID, CURRENT_USER_ID, CURRENT_CHAT_ID, CURRENT_CONTENT_SNAPSHOT, trim
 from . import repository
@@ -128,25 +129,26 @@ class UserActionsLogMiddleware(BaseMiddleware):
                 except Exception:
                     state = None
 
-            # If user clicked "open_{id}" or "save_{id}_<prev>", snapshot content for later delivery logging
+            # If user clicked "open" or "save", snapshot content for later delivery logging
+            # (callback data is decoded once, by CallbackDataMiddleware)
             snapshot: Optional[Dict[str, Any]] = None
-            if isinstance(event, CallbackQuery) and event.data:
-                if event.data.startswith("open_") or event.data.startswith("save_"):
-                    try:
-                        cid = int(event.data.removeprefix("open_").removeprefix("save_").split("_", 1)[0])
-                        content = await get_content(cid)
-                        if content:
-                            bc_items = await get_breadcrumb(cid)
-                            breadcrumb = " › ".join(i.title for i in bc_items)
-                            snapshot = {
-                                "content_id": cid,
-                                "content_title": content.title,
-                                "content_body": content.body,
-                                "breadcrumb": breadcrumb,
-                                "text_digest": digest((content.body or content.title or "")[:100000])
-                            }
-                    except Exception as e:
-                        logger.warning(f"Failed to build content snapshot for {event.data}: {e}")
+            callback: Optional[Callback] = data.get("callback")
+            if callback is not None and callback.action in (Action.OPEN, Action.SAVE):
+                cid = callback.item_id
+                try:
+                    content = await get_content_cached(cid)
+                    if content:
+                        bc_items = await get_breadcrumb_cached(cid)
+                        breadcrumb = " › ".join(i.title for i in bc_items)
+                        snapshot = {
+                            "content_id": cid,
+                            "content_title": content.title,
+                            "content_body": content.body,
+                            "breadcrumb": breadcrumb,
+                            "text_digest": digest((content.body or content.title or "")[:100000])
+                        }
+                except Exception as e:
+                    logger.warning(f"Failed to build content snapshot for {cb_data}: {e}")
 
             meta = {
                 "middleware": "UserActionsLogMiddleware",
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import json
+from collections import Counter
 from typing import Any, Optional
 
-from src.tools.db import execute as pg_execute, fetchrow
+from src.bot.callbacks import Action, decode as decode_callback
+from src.tools.db import execute as pg_execute, fetch, fetchrow
 
 
 async def upsert_user(user: Any) -> None:
@@ -131,3 +133,26 @@ async def insert_delivery(
         sent_text, text_digest, content_title, content_body, breadcrumb,
         json.dumps({"method_dump": method_dump}),
     )
+
+
+async def top_opened_content_ids(*, window_hours: int, limit: int) -> list[tuple[int, int]]:
+    """
+    Most opened content ids ("open" callbacks, current and legacy encoding) within the last
+    `window_hours`. Returns [(content_id, opens), …] ordered by popularity.
+    """
+    rows = await fetch(
+        r"""
+        SELECT data, count(*) AS opens
+          FROM public.bot_user_activity_log
+         WHERE occurred_at >= now() - make_interval(hours => $1)
+           AND (data ~ '^open_[0-9]+$' OR data ~ '^1o\.[0-9a-z]+$')
+         GROUP BY data;
+        """,
+        window_hours,
+    )
+    opens: Counter[int] = Counter()
+    for r in rows:
+        cb = decode_callback(r["data"])
+        if cb is not None and cb.action is Action.OPEN:
+            opens[cb.item_id] += r["opens"]
+    return opens.most_common(limit)
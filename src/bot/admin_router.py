@@ -0,0 +1,55 @@
+import json
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.types import Message
+from loguru import logger
+
+from src.bot.cache_layer import get_cache_stats
+from src.config import settings
+
+router = Router(name="admin")
+router.message.filter(F.from_user.id.in_(settings.admin_ids))
+
+
+_MAX_MSG_LEN = 3500
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value}ms"
+
+
+def _format_cache_stats(stats: dict) -> list[str]:
+    """Human-readable report, split into Telegram-sized pieces."""
+    lines = [
+        f"generation: {stats['generation']}",
+        f"content tree: {'loaded' if stats['content_tree']['loaded'] else 'not loaded'}, "
+        f"{stats['content_tree']['nodes']} nodes",
+        "single-flight: " + ", ".join(f"{k}={v}" for k, v in stats["single_flight"].items()),
+        "",
+    ]
+    for name, c in stats["caches"].items():
+        lines.append(
+            f"{name}: {c['size']}/{c['maxsize']} entries, {c['bytes'] // 1024} KiB\n"
+            f"  hits={c['hits']} misses={c['misses']} ratio={c['hit_ratio']}\n"
+            f"  expired={c['expirations']} evicted={c['evictions']}\n"
+            f"  loads={c['loads']} avg={_ms(c['load_ms_avg'])} max={_ms(c['load_ms_max'])}"
+        )
+
+    pieces, current = [], ""
+    for line in lines:
+        if current and len(current) + len(line) + 1 > _MAX_MSG_LEN:
+            pieces.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    pieces.append(current)
+    return pieces
+
+
+@router.message(Command("cache_stats"))
+async def cmd_cache_stats(msg: Message) -> None:
+    stats = get_cache_stats()
+    for piece in _format_cache_stats(stats):
+        await msg.answer(f"<pre>{piece}</pre>")
+    # full JSON goes to the logs for later analysis
+    logger.info(f"cache_stats: {json.dumps(stats)}")
@@ -1,57 +1,99 @@
 from __future__ import annotations
 
-import time
-from collections import OrderedDict
-from typing import Any, Hashable, Optional, List
-
-from src.content.models import Content
-from src.bot.content_dao import get_children, get_content, get_breadcrumb
-from src.content import build_breadcrumb_text, render_leaf_message
-from src.bot.keyboard import _clean_for_btn
-
-
-# Minimal LRU + TTL cache
-class TTLCache:
-    def __init__(self, ttl_seconds: int = 120, maxsize: int = 1024):
-        self.ttl = ttl_seconds
-        self.maxsize = maxsize
-        self._store: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
-
-    def _purge(self) -> None:
-        now = time.time()
-        # drop expired
-        for k, (exp, _) in list(self._store.items()):
-            if exp < now:
-                self._store.pop(k, None)
-        # enforce size
-        while len(self._store) > self.maxsize:
-            self._store.popitem(last=False)
-
-    def get(self, key: Hashable) -> Any | None:
-        item = self._store.get(key)
-        if not item:
-            return None
-        exp, val = item
-        if exp < time.time():
-            self._store.pop(key, None)
-            return None
-        self._store.move_to_end(key)
-        return val
+import asyncio
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Hashable, Optional, Sequence
+
+from aiogram.types import InlineKeyboardMarkup
+from loguru import logger
+
+from src.content.models import ChildrenPage, Content, ContentSummary, NodeView
+from src.bot.content_dao import (
+    get_breadcrumb,
+    get_breadcrumbs_many,
+    get_children_page,
+    get_children_summaries,
+    get_content,
+    get_contents_many,
+    get_node_view,
+    get_rendered_leaf,
+)
+from src.bot.content_tree import current_tree
+from src.content import (
+    LEAF_MAX_LEN,
+    RENDER_VERSION,
+    build_breadcrumb_text,
+    render_leaf_message,
+)
+from src.content.generation import GenerationChange, current_generation, on_generation_change
+from src.bot.keyboard import _clean_for_btn, build_children_kb, with_save_button
+from src.bot.message_edit import edit_stats
+from src.config import settings
+from src.tools.cache import MISSING, TTLCache, cache_stats
+from src.tools.singleflight import SingleFlight
+
+
+# DB-bound: по умолчанию без TTL — актуальность обеспечивает поколение контента
+# (см. src/content/generation.py); опционально stale-while-revalidate (см. settings),
+# ограниченный размер
+# None из get_content кешируется коротко (negative caching) — устаревшие open_<id> не ходят в БД
+_DB_TTL = {
+    "ttl_seconds": settings.CONTENT_CACHE_TTL_SECONDS,
+    "soft_ttl_seconds": settings.CONTENT_CACHE_SOFT_TTL_SECONDS,
+}
+_cache_get_content = TTLCache(
+    name="get_content", **_DB_TTL, maxsize=4096*4, negative_ttl_seconds=300
+)
+_cache_get_children = TTLCache(
+    name="get_children", **_DB_TTL, maxsize=4096*4, max_bytes=64 * 1024 * 1024
+)
+_cache_get_breadcrumb = TTLCache(name="get_breadcrumb", **_DB_TTL, maxsize=4096*4)
 
-    def set(self, key: Hashable, value: Any) -> None:
-        self._store[key] = (time.time() + self.ttl, value)
-        self._purge()
+# CPU/строки: TTL подольше
+_cache_clean_btn = TTLCache(name="clean_btn", ttl_seconds=3600, maxsize=8192*4)
+_cache_breadcrumb_text = TTLCache(name="breadcrumb_text", ttl_seconds=3600, maxsize=4096*4)
+_cache_render_leaf = TTLCache(
+    name="render_leaf", ttl_seconds=3600, maxsize=4096*4, max_bytes=64 * 1024 * 1024
+)
+
+_ALL_CACHES = (
+    _cache_get_content,
+    _cache_get_children,
+    _cache_get_breadcrumb,
+    _cache_clean_btn,
+    _cache_breadcrumb_text,
+    _cache_render_leaf,
+)
+
+
+def _on_generation(change: GenerationChange) -> None:
+    if change.changed_ids is None:
+        # unknown change set (startup, missed notifications) → drop everything at once
+        for cache in _ALL_CACHES:
+            cache.advance_generation(change.generation)
+        return
+
+    # targeted invalidation: only DB-bound entries that mention a changed id;
+    # CPU caches are keyed by text/digest and cannot go stale
+    ids = change.changed_ids
+    parents = set(ids) | set(change.parent_ids)
+    for i in ids:
+        _cache_get_content.pop(_key_content(i))
+    # children entries (full lists and pages) are keyed (kind, parent_id, …)
+    _cache_get_children.discard_where(
+        lambda k, v: k[1] in parents or any(c.id in ids for c in _summaries(v))
+    )
+    _cache_get_breadcrumb.discard_where(lambda _k, v: any(c.id in ids for c in v))
+    for cache in _ALL_CACHES:
+        cache.advance_generation(change.generation, flush=False)
 
 
-# DB-bound: короткий TTL, ограниченный размер
-_cache_get_content = TTLCache(ttl_seconds=3600, maxsize=4096*4)
-_cache_get_children = TTLCache(ttl_seconds=3600, maxsize=4096*4)
-_cache_get_breadcrumb = TTLCache(ttl_seconds=3600, maxsize=4096*4)
+on_generation_change(_on_generation)
 
-# CPU/строки: TTL подольше
-_cache_clean_btn = TTLCache(ttl_seconds=3600, maxsize=8192*4)
-_cache_breadcrumb_text = TTLCache(ttl_seconds=3600, maxsize=4096*4)
-_cache_render_leaf = TTLCache(ttl_seconds=3600, maxsize=4096*4)
+# Concurrent misses for the same key share one DB query
+# (keys are namespaced, one instance is enough)
+_db_flight = SingleFlight()
+_refresh_tasks: set[asyncio.Task] = set()
 
 
 # Keys
@@ -59,6 +101,14 @@ def _key_children(parent_id: Optional[int]) -> tuple[str, Optional[int]]:
     return "children", parent_id
 
 
+def _key_children_page(parent_id: Optional[int], page: int) -> tuple[str, Optional[int], int]:
+    return "children_page", parent_id, page
+
+
+def _summaries(v: Sequence[ContentSummary] | ChildrenPage) -> Sequence[ContentSummary]:
+    return v.items if isinstance(v, ChildrenPage) else v
+
+
 def _key_content(item_id: int) -> tuple[str, int]:
     return "content", item_id
 
@@ -67,15 +117,19 @@ def _key_breadcrumb(item_id: int) -> tuple[str, int]:
     return "breadcrumb_chain", item_id
 
 
+def _key_node_view(item_id: int, page: int) -> tuple[str, int, int]:
+    return "node_view", item_id, page
+
+
 def _key_clean_btn(text: str) -> tuple[str, str]:
     return "clean_btn", text
 
 
-def _key_breadcrumb_text(items: List[Content]) -> tuple[str, tuple[tuple[int, str], ...]]:
+def _key_breadcrumb_text(items: Sequence[Content]) -> tuple[str, tuple[tuple[int, str], ...]]:
     return "breadcrumb_text", tuple((i.id, i.title) for i in items)
 
 
-def _key_render_leaf(item: Content, breadcrumb_items: List[Content], max_len: int) -> tuple[
+def _key_render_leaf(item: Content, breadcrumb_items: Sequence[Content], max_len: int) -> tuple[
     str, int, str, int, tuple[tuple[int, str], ...]
 ]:
     # text_digest меняется при обновлении контента → естественная инвалидация
@@ -88,62 +142,288 @@ def _key_render_leaf(item: Content, breadcrumb_items: List[Content], max_len: in
     )
 
 
+def _loader_for(
+    cache: TTLCache, key: Hashable, loader: Callable[[], Awaitable[Any]]
+) -> Callable[[], Awaitable[Any]]:
+    async def _load() -> Any:
+        gen = current_generation()
+        t0 = perf_counter()
+        value = await loader()
+        cache.record_load(perf_counter() - t0)
+        cache.set(key, value, generation=gen)
+        return value
+
+    return _load
+
+
+def _refresh_in_background(key: Hashable, load: Callable[[], Awaitable[Any]]) -> None:
+    task = asyncio.create_task(_db_flight.do(key, load))
+    _refresh_tasks.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        _refresh_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(
+                f"Background refresh of {key!r} failed, keeping stale value: {t.exception()}"
+            )
+
+    task.add_done_callback(_done)
+
+
+async def _load_through(
+    cache: TTLCache, key: Hashable, loader: Callable[[], Awaitable[Any]]
+) -> Any:
+    v, stale = cache.lookup(key)
+    if v is not MISSING:
+        # stale-while-revalidate: answer now, refresh once in the background
+        if stale and key not in _db_flight:
+            _refresh_in_background(key, _loader_for(cache, key, loader))
+        return v
+
+    return await _db_flight.do(key, _loader_for(cache, key, loader))
+
+
+def get_cache_stats() -> dict[str, Any]:
+    """Counters of every cache, the single-flight layer and the content tree (metrics, admins)."""
+    tree = current_tree()
+    return {
+        "generation": current_generation(),
+        "content_tree": {"loaded": tree is not None, "nodes": len(tree.nodes) if tree else 0},
+        "single_flight": _db_flight.stats(),
+        "message_edits": edit_stats(),
+        "caches": cache_stats(),
+    }
+
+
 # Cached wrappers (public API)
+# Served from the in-memory content tree when it is loaded for the current generation;
+# the DB (behind the caches) is only a fallback.
 async def get_content_cached(item_id: int) -> Content | None:
-    k = _key_content(item_id)
-    v = _cache_get_content.get(k)
-    if v is not None:
-        return v
-    v = await get_content(item_id)
-    _cache_get_content.set(k, v)
-    return v
+    if (tree := current_tree()) is not None:
+        return tree.nodes.get(item_id)
+    return await _load_through(
+        _cache_get_content, _key_content(item_id), lambda: get_content(item_id)
+    )
 
 
-async def get_children_cached(parent_id: Optional[int]) -> list[Content]:
-    k = _key_children(parent_id)
-    v = _cache_get_children.get(k)
-    if v is not None:
-        return v
-    v = await get_children(parent_id)
-    _cache_get_children.set(k, v)
-    return v
+async def get_children_cached(parent_id: Optional[int]) -> Sequence[ContentSummary]:
+    if (tree := current_tree()) is not None:
+        return tree.children.get(parent_id, ())
+    return await _load_through(
+        _cache_get_children, _key_children(parent_id), lambda: get_children_summaries(parent_id)
+    )
 
 
-async def get_breadcrumb_cached(item_id: int) -> list[Content]:
-    k = _key_breadcrumb(item_id)
-    v = _cache_get_breadcrumb.get(k)
-    if v is not None:
-        return v
-    v = await get_breadcrumb(item_id)
-    _cache_get_breadcrumb.set(k, v)
-    return v
+async def get_children_page_cached(parent_id: Optional[int], page: int) -> ChildrenPage:
+    """One menu page (MENU_PAGE_SIZE children); only that page's titles are fetched."""
+    if (tree := current_tree()) is not None:
+        return tree.children_page(parent_id, page)
+    return await _load_through(
+        _cache_get_children,
+        _key_children_page(parent_id, page),
+        lambda: get_children_page(parent_id, page, settings.MENU_PAGE_SIZE),
+    )
+
+
+async def get_breadcrumb_cached(item_id: int) -> Sequence[Content]:
+    if (tree := current_tree()) is not None:
+        return tree.breadcrumbs.get(item_id, ())
+    return await _load_through(
+        _cache_get_breadcrumb, _key_breadcrumb(item_id), lambda: get_breadcrumb(item_id)
+    )
+
+
+async def get_node_view_cached(item_id: int, page: int = 0) -> NodeView | None:
+    """
+    Node, one page of its children and breadcrumb for a menu screen. Assembled from the per-id
+    caches when all three are there; otherwise fetched in one round-trip (`get_node_view`),
+    which then fills the content, children and breadcrumb caches.
+    """
+    if (tree := current_tree()) is not None:
+        item = tree.nodes.get(item_id)
+        if item is None:
+            return None
+        kids = tree.children_page(item_id, page)
+        return NodeView(item, kids.items, tree.breadcrumbs.get(item_id, ()), kids.page, kids.pages)
+
+    item = _cache_get_content.get(_key_content(item_id), MISSING)
+    if item is None:  # negative entry
+        return None
+    kids = _cache_get_children.get(_key_children_page(item_id, page), MISSING)
+    breadcrumb = _cache_get_breadcrumb.get(_key_breadcrumb(item_id), MISSING)
+    if item is not MISSING and kids is not MISSING and breadcrumb is not MISSING:
+        return NodeView(item, kids.items, breadcrumb, kids.page, kids.pages)
+
+    async def _load() -> NodeView | None:
+        gen = current_generation()
+        t0 = perf_counter()
+        view = await get_node_view(item_id, page=page, page_size=settings.MENU_PAGE_SIZE)
+        _cache_get_content.record_load(perf_counter() - t0)
+        if view is None:
+            _cache_get_content.set(_key_content(item_id), None, generation=gen)
+            return None
+        _cache_get_content.set(_key_content(item_id), view.item, generation=gen)
+        kids = ChildrenPage(view.children, view.page, view.pages)
+        _cache_get_children.set(_key_children_page(item_id, view.page), kids, generation=gen)
+        if view.pages == 1:  # the page is the whole list
+            _cache_get_children.set(_key_children(item_id), view.children, generation=gen)
+        _cache_get_breadcrumb.set(_key_breadcrumb(item_id), view.breadcrumb, generation=gen)
+        return view
+
+    return await _db_flight.do(_key_node_view(item_id, page), _load)
+
+
+async def get_contents_many_cached(item_ids: Sequence[int]) -> tuple[list[Content], list[int]]:
+    """
+    Many items at once, in the order of `item_ids`, plus the ids that do not exist.
+    Cache misses are fetched together in one query; every result (including a missing id,
+    as a negative entry) lands in the per-id cache used by `get_content_cached`.
+    """
+    if (tree := current_tree()) is not None:
+        found = [tree.nodes[i] for i in item_ids if i in tree.nodes]
+        return found, [i for i in dict.fromkeys(item_ids) if i not in tree.nodes]
+
+    by_id: dict[int, Optional[Content]] = {}
+    to_load: list[int] = []
+    for i in dict.fromkeys(item_ids):
+        v = _cache_get_content.get(_key_content(i), MISSING)
+        if v is MISSING:
+            to_load.append(i)
+        else:
+            by_id[i] = v
+    if to_load:
+        gen = current_generation()
+        t0 = perf_counter()
+        loaded, not_found = await get_contents_many(to_load)
+        _cache_get_content.record_load(perf_counter() - t0)
+        for item in loaded:
+            _cache_get_content.set(_key_content(item.id), item, generation=gen)
+            by_id[item.id] = item
+        for i in not_found:
+            _cache_get_content.set(_key_content(i), None, generation=gen)
+            by_id[i] = None
+
+    found = [v for i in item_ids if (v := by_id.get(i)) is not None]
+    return found, [i for i in dict.fromkeys(item_ids) if by_id.get(i) is None]
+
+
+async def get_breadcrumbs_many_cached(item_ids: Sequence[int]) -> dict[int, Sequence[Content]]:
+    """Breadcrumbs for many ids; cache misses are resolved together in one query."""
+    if (tree := current_tree()) is not None:
+        return {i: tree.breadcrumbs.get(i, ()) for i in item_ids}
+
+    out: dict[int, Sequence[Content]] = {}
+    missing: list[int] = []
+    for i in dict.fromkeys(item_ids):
+        v = _cache_get_breadcrumb.get(_key_breadcrumb(i), MISSING)
+        if v is MISSING:
+            missing.append(i)
+        else:
+            out[i] = v
+    if missing:
+        gen = current_generation()
+        t0 = perf_counter()
+        chains = await get_breadcrumbs_many(missing)
+        _cache_get_breadcrumb.record_load(perf_counter() - t0)
+        for i, chain in chains.items():
+            _cache_get_breadcrumb.set(_key_breadcrumb(i), chain, generation=gen)
+            out[i] = chain
+    return out
+
+
+def category_kb_cached(
+    node_id: Optional[int],
+    children: Sequence[ContentSummary],
+    parent_id: Optional[int],
+    *,
+    page: int = 0,
+    pages: int = 1,
+) -> InlineKeyboardMarkup:
+    """
+    Keyboard of one page of a category screen (`node_id=None` — the main menu). Precomputed
+    once per content generation in the content tree; built here only while it is not loaded.
+    """
+    if (tree := current_tree()) is not None:
+        kb = tree.keyboards.get(
+            ("menu", None, page) if node_id is None else ("category", node_id, page)
+        )
+        if kb is not None:
+            return kb
+    if node_id is None:
+        return build_children_kb(children, parent_id=None, main_menu=True, page=page, pages=pages)
+    return build_children_kb(
+        children, current_id=node_id, parent_id=parent_id, page=page, pages=pages
+    )
+
+
+def leaf_kb_cached(
+    item: Content, previous_menu_message_id: Optional[int] = None
+) -> InlineKeyboardMarkup:
+    """
+    Navigation under an opened article + the per-message "save" button (if the menu message is
+    known).
+    """
+    tree = current_tree()
+    nav = tree.keyboards.get(("leaf", item.id, 0)) if tree is not None else None
+    if nav is None:
+        nav = build_children_kb([], parent_id=item.parent_id)
+    if previous_menu_message_id is None:
+        return nav
+    return with_save_button(nav, item.id, previous_menu_message_id)
 
 
 def _clean_for_btn_cached(text: str) -> str:
     k = _key_clean_btn(text)
-    v = _cache_clean_btn.get(k)
-    if v is not None:
+    v = _cache_clean_btn.get(k, MISSING)
+    if v is not MISSING:
         return v
     v = _clean_for_btn(text)
     _cache_clean_btn.set(k, v)
     return v
 
 
-def build_breadcrumb_text_cached(items: List[Content]) -> str:
+def build_breadcrumb_text_cached(items: Sequence[Content]) -> str:
     k = _key_breadcrumb_text(items)
-    v = _cache_breadcrumb_text.get(k)
-    if v is not None:
+    v = _cache_breadcrumb_text.get(k, MISSING)
+    if v is not MISSING:
         return v
     v = build_breadcrumb_text(items)
     _cache_breadcrumb_text.set(k, v)
     return v
 
 
-def render_leaf_message_cached(item: Content, breadcrumb_items: List[Content], *, max_len: int = 3800):
+async def render_leaf_message_cached(
+    item: Content, breadcrumb_items: Sequence[Content], *, max_len: int = LEAF_MAX_LEN
+) -> tuple[str, list[str]]:
+    """
+    Leaf message for the handlers: process cache → pre-rendered row from `content_rendered`
+    (written by sync, valid while digest/breadcrumb/max_len/RENDER_VERSION match) → render
+    in-process.
+    """
     k = _key_render_leaf(item, breadcrumb_items, max_len)
-    v = _cache_render_leaf.get(k)
-    if v is not None:
+    v = _cache_render_leaf.get(k, MISSING)
+    if v is not MISSING:
         return v
-    v = render_leaf_message(item, breadcrumb_items, max_len=max_len)
+
+    async def _load() -> tuple[str, list[str]]:
+        if max_len == LEAF_MAX_LEN:
+            try:
+                stored = await get_rendered_leaf(item.id)
+            except Exception as e:
+                logger.warning(
+                    f"Pre-rendered leaf {item.id} unavailable, rendering in-process: {e}"
+                )
+                stored = None
+            if (
+                stored is not None
+                and stored.text_digest == item.text_digest
+                and stored.max_len == max_len
+                and stored.render_version == RENDER_VERSION
+                and stored.breadcrumb_text == build_breadcrumb_text_cached(breadcrumb_items)
+            ):
+                return stored.complete_text, stored.extra_chunks
+        return render_leaf_message(item, breadcrumb_items, max_len=max_len)
+
+    v = await _db_flight.do(k, _load)
     _cache_render_leaf.set(k, v)
     return v
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+# ──────────────────────────────────────────
+# Callback data protocol, v1:  "1" + action code [+ "." + base-36 field]…
+#   open 1234          → "1o.ya"
+#   save 1234, msg 77  → "1s.ya.25"
+#   open 1234, page 2  → "1o.ya.2"   (page 0 is omitted)
+# Old keyboards still sitting in chats use the legacy form (open_<id>, back_<id>, back_root,
+# save_<id>_<msg>) — `decode` understands both. Deep links (/start open_<id>) keep the legacy form:
+# start parameters may not contain ".".
+# ──────────────────────────────────────────
+VERSION = "1"
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+class Action(str, Enum):
+    OPEN = "o"
+    BACK = "b"
+    HOME = "h"
+    SAVE = "s"
+
+
+@dataclass(frozen=True, slots=True)
+class Callback:
+    action: Action
+    item_id: Optional[int] = None
+    message_id: Optional[int] = None
+    page: int = 0
+
+
+def _b36(n: int) -> str:
+    if n < 0:
+        raise ValueError(f"negative id in callback data: {n}")
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = _DIGITS[r] + out
+        if not n:
+            return out
+
+
+# fields of each action in wire order; a trailing "page" may be left out (= 0)
+_LAYOUT = {
+    Action.OPEN: ("item_id", "page"),
+    Action.BACK: ("item_id",),
+    Action.HOME: ("page",),
+    Action.SAVE: ("item_id", "message_id"),
+}
+
+
+def encode(cb: Callback) -> str:
+    values = [getattr(cb, f) for f in _LAYOUT[cb.action]]
+    if _LAYOUT[cb.action][-1:] == ("page",) and not cb.page:
+        values.pop()
+    return VERSION + cb.action.value + "".join("." + _b36(v) for v in values)
+
+
+def open_data(item_id: int, page: int = 0) -> str:
+    return encode(Callback(Action.OPEN, item_id, page=page))
+
+
+def back_data(item_id: int) -> str:
+    return encode(Callback(Action.BACK, item_id))
+
+
+def save_data(item_id: int, message_id: int) -> str:
+    return encode(Callback(Action.SAVE, item_id, message_id))
+
+
+def home_data(page: int = 0) -> str:
+    return encode(Callback(Action.HOME, page=page))
+
+
+HOME_DATA = home_data()
+
+_LEGACY = {"open": Action.OPEN, "back": Action.BACK, "save": Action.SAVE}
+
+
+def _decode_legacy(data: str) -> Optional[Callback]:
+    if data == "back_root":
+        return Callback(Action.HOME)
+    prefix, _, rest = data.partition("_")
+    action = _LEGACY.get(prefix)
+    if action is None:
+        return None
+    values = [int(f) for f in rest.split("_")]
+    if len(values) != (2 if action is Action.SAVE else 1):
+        return None
+    return Callback(action, *values)
+
+
+def decode(data: Optional[str]) -> Optional[Callback]:
+    """Callback data (current or legacy form) → Callback; None for anything unknown/malformed."""
+    if not data:
+        return None
+    try:
+        if data[0] != VERSION:
+            return _decode_legacy(data)
+        head, *parts = data[1:].split(".")
+        action = Action(head)
+        layout = _LAYOUT[action]
+        required = len(layout) - (layout[-1] == "page")
+        if not required <= len(parts) <= len(layout):
+            return None
+        return Callback(action, **{f: int(p, 36) for f, p in zip(layout, parts)})
+    except ValueError:
+        return None
+
+
+class CallbackDataMiddleware(BaseMiddleware):
+    """
+    Update outer middleware: decodes callback data once per update and puts it into handler
+    data as ``callback`` (a `Callback` or None) for the activity log and the handlers.
+    Register before ``UserActionsLogMiddleware``.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Update) and event.callback_query is not None:
+            data["callback"] = decode(event.callback_query.data)
+        return await handler(event, data)
@@ -1,38 +1,272 @@
-from src.content import Content
-from src.tools.db import execute, fetch, fetchrow
+from dataclasses import fields
+
+from src.content import ChildrenPage, Content, ContentSummary, NodeView, RenderedLeaf
+from src.tools.db import fetch, fetchrow
 
 
 _SEL = "id, parent_id, title, body, ord, text_digest, embedded_at"
+_FIELDS = tuple(f.strip() for f in _SEL.split(","))
+_SEL_C = ", ".join(f"c.{f}" for f in _FIELDS)
+_N = len(_FIELDS)
+_MAX_DEPTH = 32  # guards the recursion against accidental parent_id cycles
+
+# Rows are decoded positionally (no per-row kwargs dict), so _SEL must follow Content's fields.
+# There is no explicit prepared-statement layer: asyncpg already prepares each distinct query text
+# once per connection (its statement cache), and a PreparedStatement handle is invalidated when
+# its connection goes back to the pool, so keeping handles would not save a round trip.
+assert _FIELDS == tuple(f.name for f in fields(Content)), "_SEL is out of sync with Content"
+
+
+def paginate(total: int, page: int, page_size: int | None) -> tuple[int, int]:
+    """(page clamped into range, number of pages) for `total` children; no page size → one page."""
+    if not page_size or total <= page_size:
+        return 0, 1
+    pages = -(-total // page_size)
+    return min(max(page, 0), pages - 1), pages
+
+
+def _content(r) -> Content:
+    """Row whose first columns are `_SEL`; extra columns (leaf_id, kind, …) go after them."""
+    return Content(*r[:_N])
+
+
+# `chain` = the node and its ancestors (hops = distance from the node). Read from the
+# materialised `path` (primary-key lookups); rows whose path is not maintained ('{}', written
+# outside sync) fall back to walking parent_id.
+_CHAIN = f"""
+    WITH RECURSIVE walk AS (
+        SELECT {_SEL}, 0 AS hops FROM content WHERE id = $1 AND cardinality(path) = 0
+        UNION ALL
+        SELECT {_SEL_C}, walk.hops + 1
+          FROM content c
+          JOIN walk ON c.id = walk.parent_id
+         WHERE walk.hops < $2
+    ),
+    chain AS (
+        SELECT {_SEL_C}, t.depth - c.depth AS hops
+          FROM content t
+          JOIN content c ON c.id = ANY(t.path)
+         WHERE t.id = $1
+        UNION ALL
+        SELECT * FROM walk
+    )
+"""
+_SQL_BREADCRUMB = _CHAIN + f"SELECT {_SEL} FROM chain ORDER BY hops DESC;"
+_SQL_CHILDREN = (
+    f"SELECT {_SEL} FROM content WHERE parent_id IS NOT DISTINCT FROM $1 ORDER BY ord, id;"
+)
+_SQL_CONTENT = f"SELECT {_SEL} FROM content WHERE id = $1;"
+_HAS_CHILDREN = "EXISTS (SELECT 1 FROM content ch WHERE ch.parent_id = c.id)"
+_SQL_CHILD_SUMMARIES = f"""
+    SELECT c.id, c.title, c.ord, {_HAS_CHILDREN}
+      FROM content c
+     WHERE c.parent_id IS NOT DISTINCT FROM $1
+     ORDER BY c.ord, c.id;
+"""
+# one page ($2 rows from $3) + the number of all children (window count runs before LIMIT);
+# the EXISTS probe only runs for the rows of the page
+_SQL_CHILD_PAGE = """
+    SELECT p.id, p.title, p.ord,
+           EXISTS (SELECT 1 FROM content ch WHERE ch.parent_id = p.id), p.total
+      FROM (SELECT c.id, c.title, c.ord, count(*) OVER () AS total
+              FROM content c
+             WHERE c.parent_id IS NOT DISTINCT FROM $1
+             ORDER BY c.ord, c.id
+             LIMIT $2 OFFSET $3) p
+     ORDER BY p.ord, p.id;
+"""
+_SQL_CHILD_COUNT = "SELECT count(*) FROM content WHERE parent_id IS NOT DISTINCT FROM $1;"
+# children: only page $3/$4 (LIMIT NULL = all); breadcrumb rows carry the total number of children
+_SQL_NODE_VIEW = _CHAIN + f"""
+    SELECT {_SEL}, 'b' AS kind, -hops AS pos, NULL::bool AS has_children,
+           (SELECT count(*) FROM content WHERE parent_id = $1) AS total
+      FROM chain
+    UNION ALL
+    (SELECT c.id, NULL, c.title, NULL, c.ord, NULL, NULL,
+            'c', row_number() OVER (ORDER BY c.ord, c.id), {_HAS_CHILDREN}, NULL
+       FROM content c
+      WHERE c.parent_id = $1
+      ORDER BY c.ord, c.id
+      LIMIT $3 OFFSET $4)
+    ORDER BY kind, pos;
+"""
 
 
 async def get_breadcrumb(item_id: int) -> list[Content]:
     """
     Возвращает список объектов Content,
     начиная с корня и заканчивая `item_id`.
+    Одним запросом (WITH RECURSIVE) вместо SELECT на каждого предка.
     """
-    chain: list[Content] = []
+    rows = await fetch(_SQL_BREADCRUMB, item_id, _MAX_DEPTH)
+    return [Content(*r) for r in rows]
 
-    current_id: int | None = item_id
-    while current_id is not None:
-        item = await get_content(current_id)
-        if item is None:
-            break
-        chain.append(item)
-        current_id = item.parent_id
 
-    return list(reversed(chain))
+async def get_breadcrumbs_many(item_ids: list[int]) -> dict[int, list[Content]]:
+    """
+    Breadcrumb chains for many ids in one statement: {id: [root, …, id]}.
+    Ids that do not exist map to an empty list.
+    """
+    rows = await fetch(
+        f"""
+        WITH RECURSIVE walk AS (
+            SELECT id AS leaf_id, {_SEL}, 0 AS hops
+              FROM content
+             WHERE id = ANY($1::bigint[]) AND cardinality(path) = 0
+            UNION ALL
+            SELECT walk.leaf_id, {_SEL_C}, walk.hops + 1
+              FROM content c
+              JOIN walk ON c.id = walk.parent_id
+             WHERE walk.hops < $2
+        )
+        SELECT {_SEL_C}, t.id AS leaf_id, t.depth - c.depth AS hops
+          FROM content t
+          JOIN content c ON c.id = ANY(t.path)
+         WHERE t.id = ANY($1::bigint[])
+        UNION ALL
+        SELECT {_SEL}, leaf_id, hops FROM walk
+        ORDER BY leaf_id, hops DESC;
+        """,
+        list(item_ids),
+        _MAX_DEPTH,
+    )
+    chains: dict[int, list[Content]] = {i: [] for i in item_ids}
+    for r in rows:
+        chains[r[_N]].append(_content(r))
+    return chains
 
 
 async def get_children(parent: int | None) -> list[Content]:
+    rows = await fetch(_SQL_CHILDREN, parent)
+    return [Content(*r) for r in rows]
+
+
+async def get_children_summaries(parent: int | None) -> list[ContentSummary]:
+    """Children for menus: id, title, ord and whether they have children — bodies stay in the DB."""
+    rows = await fetch(_SQL_CHILD_SUMMARIES, parent)
+    return [ContentSummary(*r) for r in rows]
+
+
+async def get_children_page(parent: int | None, page: int, page_size: int) -> ChildrenPage:
+    """
+    Page `page` of the children summaries — only that page's titles leave the DB. A page past
+    the end (the menu shrank since the keyboard was sent) is clamped to the last page, like
+    `get_node_view` and `ContentTree.children_page`.
+    """
+    rows = await fetch(_SQL_CHILD_PAGE, parent, page_size, max(page, 0) * page_size)
+    if not rows:
+        total = (await fetchrow(_SQL_CHILD_COUNT, parent))[0] if page > 0 else 0
+        if not total:
+            return ChildrenPage([])
+        page, _pages = paginate(total, page, page_size)
+        rows = await fetch(_SQL_CHILD_PAGE, parent, page_size, page * page_size)
+        if not rows:  # emptied in between
+            return ChildrenPage([])
+    page, pages = paginate(rows[0][4], page, page_size)
+    return ChildrenPage([ContentSummary(*r[:4]) for r in rows], page, pages)
+
+
+async def get_content(item_id: int) -> Content | None:
+    row = await fetchrow(_SQL_CONTENT, item_id)
+    return Content(*row) if row else None
+
+
+async def get_contents_many(item_ids: list[int]) -> tuple[list[Content], list[int]]:
+    """
+    Many items in one statement (`= ANY($1)`) instead of a SELECT per id.
+    Returns (found items in the order of `item_ids`, ids that do not exist).
+    """
+    if not item_ids:
+        return [], []
     rows = await fetch(
-        f"SELECT {_SEL} FROM content "
-        "WHERE parent_id IS NOT DISTINCT FROM $1 "
-        "ORDER BY ord, id;",
-        parent,
+        f"SELECT {_SEL} FROM content WHERE id = ANY($1::bigint[]);",
+        list(dict.fromkeys(item_ids)),
     )
-    return [Content(**r) for r in rows]
+    by_id = {r[0]: Content(*r) for r in rows}
+    found = [by_id[i] for i in item_ids if i in by_id]
+    missing = [i for i in dict.fromkeys(item_ids) if i not in by_id]
+    return found, missing
 
 
-async def get_content(item_id: int) -> Content | None:
-    row = await fetchrow(f"SELECT {_SEL} FROM content WHERE id = $1;", item_id)
-    return Content(**row) if row else None
+async def get_node_view(
+    item_id: int, *, page: int = 0, page_size: int | None = None
+) -> NodeView | None:
+    """
+    Node + ordered children + breadcrumb in one statement (one round-trip for cb_open/cb_back).
+    Children are `ContentSummary` rows of page `page` only (all of them without `page_size`) —
+    the body of a child is loaded when it is opened itself.
+    """
+    offset = max(page, 0) * page_size if page_size else 0
+    rows = await fetch(_SQL_NODE_VIEW, item_id, _MAX_DEPTH, page_size, offset)
+    breadcrumb: list[Content] = []
+    children: list[ContentSummary] = []
+    total = 0
+    for r in rows:
+        if r[_N] == "b":
+            breadcrumb.append(_content(r))
+            total = r[_N + 3]
+        else:
+            children.append(ContentSummary(r[0], r[2], r[4], r[_N + 2]))
+    if not breadcrumb or breadcrumb[-1].id != item_id:
+        return None
+    clamped, pages = paginate(total, page, page_size)
+    if clamped != page and not children and total:
+        # page past the end (the node lost children since the keyboard was sent) → last page
+        return await get_node_view(item_id, page=clamped, page_size=page_size)
+    return NodeView(breadcrumb[-1], children, breadcrumb, clamped, pages)
+
+
+async def get_subtree_leaves(root_id: int) -> list[Content]:
+    """
+    Every leaf under `root_id` (e.g. all articles of a country), `root_id` itself if it is a leaf.
+    One GIN lookup on `path` instead of walking the subtree level by level.
+    """
+    rows = await fetch(
+        f"""
+        SELECT {_SEL_C}
+          FROM content c
+         WHERE c.path @> ARRAY[$1]::bigint[]
+           AND NOT EXISTS (SELECT 1 FROM content ch WHERE ch.parent_id = c.id)
+         ORDER BY c.path;
+        """,
+        root_id,
+    )
+    return [Content(*r) for r in rows]
+
+
+# any query lexeme may match (OR): questions are phrased freely, ranking sorts it out;
+# lexemes are quoted and cast (not re-parsed), so the query stems exactly like the column
+_SQL_SEARCH_FTS = """
+    WITH q AS (
+        SELECT array_to_string(
+                   ARRAY(SELECT quote_literal(l)
+                           FROM unnest(tsvector_to_array(to_tsvector('russian'::regconfig, $1))) l),
+                   ' | '
+               )::tsquery AS q
+    )
+    SELECT c.id, ts_rank_cd(c.tsv, q.q) AS rank
+      FROM content c, q
+     WHERE c.tsv @@ q.q
+     ORDER BY rank DESC, c.id
+     LIMIT $2;
+"""
+
+
+async def search_fts(query: str, limit: int) -> list[tuple[int, float]]:
+    """Postgres full-text search over titles and bodies (`tsv`): [(id, rank)], best first."""
+    rows = await fetch(_SQL_SEARCH_FTS, query, limit)
+    return [(r[0], r[1]) for r in rows]
+
+
+async def get_rendered_leaf(item_id: int) -> RenderedLeaf | None:
+    row = await fetchrow(
+        "SELECT content_id, text_digest, max_len, render_version, breadcrumb_text, complete_text, "
+        "extra_chunks FROM content_rendered WHERE content_id = $1;",
+        item_id,
+    )
+    return RenderedLeaf(**row) if row else None
+
+
+async def get_all_content() -> list[Content]:
+    rows = await fetch(f"SELECT {_SEL} FROM content ORDER BY parent_id NULLS FIRST, ord, id;")
+    return [Content(*r) for r in rows]
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Iterable, Literal, Mapping, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+from loguru import logger
+
+from src.bot.content_dao import get_all_content, paginate
+from src.bot.keyboard import _clean_for_btn, build_children_kb
+from src.config import settings
+from src.content.generation import GenerationChange, current_generation, on_generation_change
+from src.content.models import ChildrenPage, Content, ContentSummary
+
+# "menu" — main menu (node id None); "category" — screen of a node with children;
+# "leaf" — navigation under an opened article (shared by all leaves of one parent)
+KeyboardVariant = Literal["menu", "category", "leaf"]
+KeyboardKey = tuple[KeyboardVariant, Optional[int], int]  # (variant, node id, page)
+
+
+@dataclass(frozen=True, slots=True)
+class ContentTree:
+    """
+    Immutable, fully indexed snapshot of the `content` table for one content generation.
+
+    • nodes        — id → Content
+    • children     — parent_id → child summaries ordered like `get_children` (ord, id)
+    • breadcrumbs  — id → chain from the root down to the node (like `get_breadcrumb`)
+    • clean_titles — id → title prepared for buttons (`_clean_for_btn`)
+    • keyboards    — (variant, node id, page) → ready markup, one per menu page (`page_size`
+                     children each; leaves use page 0); shared by every message, never mutate
+                     (the per-message "save" row is added on a copy, see `with_save_button`)
+    """
+
+    generation: int
+    nodes: Mapping[int, Content]
+    children: Mapping[Optional[int], tuple[ContentSummary, ...]]
+    breadcrumbs: Mapping[int, tuple[Content, ...]]
+    clean_titles: Mapping[int, str]
+    keyboards: Mapping[KeyboardKey, InlineKeyboardMarkup]
+    page_size: Optional[int] = None
+
+    def children_page(self, parent_id: Optional[int], page: int) -> ChildrenPage:
+        """Page `page` of `children[parent_id]` (clamped into range, like the DB variant)."""
+        items = self.children.get(parent_id, ())
+        page, pages = paginate(len(items), page, self.page_size)
+        if pages == 1:
+            return ChildrenPage(items)
+        start = page * self.page_size
+        return ChildrenPage(items[start:start + self.page_size], page, pages)
+
+    @classmethod
+    def build(
+        cls, rows: Iterable[Content], *, generation: int, page_size: Optional[int] = None
+    ) -> "ContentTree":
+        nodes = {r.id: r for r in rows}
+
+        children: dict[Optional[int], list[Content]] = {}
+        for node in nodes.values():
+            children.setdefault(node.parent_id, []).append(node)
+        for lst in children.values():
+            lst.sort(key=lambda c: (c.ord, c.id))
+
+        breadcrumbs: dict[int, tuple[Content, ...]] = {}
+        for node_id in nodes:
+            if node_id in breadcrumbs:
+                continue
+            # walk up until a node with a known chain (or the root / a dangling parent)
+            path: list[Content] = []
+            seen: set[int] = set()
+            current: Optional[Content] = nodes[node_id]
+            while current is not None and current.id not in breadcrumbs and current.id not in seen:
+                seen.add(current.id)
+                path.append(current)
+                current = nodes.get(current.parent_id) if current.parent_id is not None else None
+            prefix = breadcrumbs.get(current.id, ()) if current is not None else ()
+            for n in reversed(path):
+                prefix = prefix + (n,)
+                breadcrumbs[n.id] = prefix
+
+        summaries = {
+            k: tuple(ContentSummary(c.id, c.title, c.ord, c.id in children) for c in v)
+            for k, v in children.items()
+        }
+
+        def pages_of(
+            items: tuple[ContentSummary, ...]
+        ) -> Iterable[tuple[int, int, tuple[ContentSummary, ...]]]:
+            _, pages = paginate(len(items), 0, page_size)
+            if pages == 1:
+                yield 0, 1, items
+                return
+            for p in range(pages):
+                yield p, pages, items[p * page_size:(p + 1) * page_size]
+
+        keyboards: dict[KeyboardKey, InlineKeyboardMarkup] = {}
+        for p, pages, items in pages_of(summaries.get(None, ())):
+            keyboards[("menu", None, p)] = build_children_kb(
+                items, parent_id=None, main_menu=True, page=p, pages=pages
+            )
+        leaf_nav: dict[Optional[int], InlineKeyboardMarkup] = {}
+        for node_id, node in nodes.items():
+            if node_id in summaries:
+                for p, pages, items in pages_of(summaries[node_id]):
+                    keyboards[("category", node_id, p)] = build_children_kb(
+                        items, current_id=node_id, parent_id=node.parent_id, page=p, pages=pages
+                    )
+            else:
+                if node.parent_id not in leaf_nav:
+                    leaf_nav[node.parent_id] = build_children_kb([], parent_id=node.parent_id)
+                keyboards[("leaf", node_id, 0)] = leaf_nav[node.parent_id]
+
+        return cls(
+            generation=generation,
+            nodes=MappingProxyType(nodes),
+            children=MappingProxyType(summaries),
+            breadcrumbs=MappingProxyType(breadcrumbs),
+            clean_titles=MappingProxyType({i: _clean_for_btn(n.title) for i, n in nodes.items()}),
+            keyboards=MappingProxyType(keyboards),
+            page_size=page_size,
+        )
+
+
+_tree: ContentTree | None = None
+_refresh_tasks: set[asyncio.Task] = set()
+_listeners: list[Callable[[ContentTree], None]] = []
+
+
+def on_tree_loaded(callback: Callable[[ContentTree], None]) -> None:
+    """Register a (synchronous) callback run for every snapshot swapped in (derived indexes)."""
+    _listeners.append(callback)
+
+
+def current_tree() -> ContentTree | None:
+    """The snapshot, but only while it matches the current content generation."""
+    tree = _tree
+    if tree is None or tree.generation != current_generation():
+        return None
+    return tree
+
+
+async def refresh_content_tree() -> ContentTree:
+    """Read the whole `content` table once and atomically swap the snapshot in."""
+    global _tree
+    generation = current_generation()
+    tree = ContentTree.build(
+        await get_all_content(), generation=generation, page_size=settings.MENU_PAGE_SIZE
+    )
+    # a slower, older refresh must not replace a newer snapshot
+    if _tree is None or tree.generation >= _tree.generation:
+        _tree = tree
+        logger.info(f"🌳 Content tree loaded: {len(tree.nodes)} nodes (generation {generation})")
+        for cb in list(_listeners):
+            try:
+                cb(tree)
+            except Exception as e:
+                logger.warning(f"Content tree listener {cb!r} failed: {e}")
+    return tree
+
+
+def _on_generation(change: GenerationChange) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(refresh_content_tree())
+    _refresh_tasks.add(task)
+
+    def _done(t: asyncio.Task) -> None:
+        _refresh_tasks.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"Content tree refresh failed, serving from DB: {t.exception()}")
+
+    task.add_done_callback(_done)
+
+
+on_generation_change(_on_generation)
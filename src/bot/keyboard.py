@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import re
 from html import unescape
+from typing import Sequence
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from src.content.models import Content
+from src.bot.callbacks import HOME_DATA, back_data, home_data, open_data, save_data
+from src.content.models import ContentSummary
 
 # ──────────────────────────────────────────
-ROOT_BACK_ID = "back_root"
+ROOT_BACK_ID = HOME_DATA
 
 # pre-compiled once – cheap & fast
 _TAG_RE = re.compile(r"<[^>]+>")
@@ -24,17 +26,34 @@ def _clean_for_btn(text: str) -> str:
     return _TAG_RE.sub("", unescape(text)).strip()
 
 
+def _page_row(node_id: int | None, page: int, pages: int) -> list[InlineKeyboardButton]:
+    """◀️ n/N ▶️ — flips pages of the same screen (`node_id=None` — the main menu)."""
+    def data(p: int) -> str:
+        return home_data(p) if node_id is None else open_data(node_id, p)
+
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton(text="◀️", callback_data=data(page - 1)))
+    row.append(InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data=data(page)))
+    if page < pages - 1:
+        row.append(InlineKeyboardButton(text="▶️", callback_data=data(page + 1)))
+    return row
+
+
 def build_children_kb(
-    children: list[Content],
+    children: Sequence[ContentSummary],
     *,
     current_id: int | None = None,
     parent_id: int | None,
     main_menu=False,
     previous_menu_message_id = None,
+    page: int = 0,
+    pages: int = 1,
 ) -> InlineKeyboardMarkup:
     """
     Build a keyboard:
-      • One button per child (ordered)
+      • One button per child (ordered) — `children` is the current page only
+      • "◀️ n/N ▶️" — only if there is more than one page (page callbacks reopen `current_id`)
       • "⬅️ Назад"  — only if *not* at root
       • "🏠 Главная" — always present
     """
@@ -44,23 +63,37 @@ def build_children_kb(
     for child in children:
         kb.button(
             text=_clean_for_btn(child.title),
-            callback_data=f"open_{child.id}",
+            callback_data=open_data(child.id),
         )
 
     kb.adjust(1)  # one column
 
+    if pages > 1:
+        kb.row(*_page_row(None if main_menu else current_id, page, pages))
+
     # nav buttons
     if not main_menu:
-        back_button_callback_data = f"back_{parent_id}" if parent_id else ROOT_BACK_ID
+        back_button_callback_data = back_data(parent_id) if parent_id else ROOT_BACK_ID
 
         kb.row(
             InlineKeyboardButton(text="⬅️ Назад", callback_data=back_button_callback_data),
             InlineKeyboardButton(text="🏠 Главная", callback_data=ROOT_BACK_ID)
         )
-        if current_id and previous_menu_message_id:
-            save_button_callback_data = f"save_{current_id}_{previous_menu_message_id}"
-            kb.row(
-                InlineKeyboardButton(text="💾 Сохранить информацию в чате", callback_data=save_button_callback_data)
-            )
+    markup = kb.as_markup(resize_keyboard=True)
+    if not main_menu and current_id and previous_menu_message_id:
+        markup = with_save_button(markup, current_id, previous_menu_message_id)
+    return markup
 
-    return kb.as_markup(resize_keyboard=True)
+
+def with_save_button(
+    markup: InlineKeyboardMarkup, current_id: int, previous_menu_message_id: int
+) -> InlineKeyboardMarkup:
+    """
+    Copy of `markup` with the per-message "save" row below it. `markup` itself is left alone —
+    precomputed keyboards (see ContentTree.keyboards) are shared between all messages.
+    """
+    save = InlineKeyboardButton(
+        text="💾 Сохранить информацию в чате",
+        callback_data=save_data(current_id, previous_menu_message_id),
+    )
+    return InlineKeyboardMarkup(inline_keyboard=[*markup.inline_keyboard, [save]])
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter
+from html import unescape
+from typing import Optional
+
+import snowballstemmer
+from loguru import logger
+
+from src.bot.content_tree import ContentTree, current_tree, on_tree_loaded
+from src.config import settings
+from src.content.models import Content
+
+# ──────────────────────────────────────────
+# Tokenising: lower-case words (ё → е), stop words dropped, Snowball stems
+# (Russian for Cyrillic words, English for Latin ones)
+# ──────────────────────────────────────────
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+_TAG_RE = re.compile(r"<[^>]+>")
+_STOP_WORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только "
+    "ее мне было вот от меня еще нет о из ему теперь когда даже ну ли если уже или ни быть был "
+    "него до вас нибудь опять уж вам ведь там потом себя ничего ей может они тут где есть надо "
+    "ней для мы тебя их чем была сам чтоб без будто чего раз тоже себе под будет ж тогда кто "
+    "этот того потому этого какой совсем ним здесь этом один почти мой тем чтобы нее были куда "
+    "зачем всех никогда можно при наконец два об другой хоть после над больше тот через эти нас "
+    "про всего них какая много разве три эту моя впрочем хорошо свою этой перед иногда лучше чуть "
+    "том нельзя такой им более всегда конечно всю между "
+    "a an the and or of to in on at for is are was were be by with as it its this that from "
+    "how what which who do does can i you we my your".split()
+)
+_stem_ru = snowballstemmer.stemmer("russian").stemWord
+_stem_en = snowballstemmer.stemmer("english").stemWord
+
+
+def tokenize(text: str) -> list[str]:
+    """Plain text or HTML → search terms."""
+    words = _WORD_RE.findall(unescape(_TAG_RE.sub(" ", text)).casefold().replace("ё", "е"))
+    return [
+        _stem_en(w) if w.isascii() else _stem_ru(w)
+        for w in words
+        if w not in _STOP_WORDS
+    ]
+
+
+_TITLE_WEIGHT = 3
+_K1 = 1.2
+_B = 0.75
+
+
+def _doc_terms(node: Content) -> Counter[str]:
+    # title words count as if they were written `_TITLE_WEIGHT` times (cheap BM25F)
+    terms = Counter(tokenize(node.body or ""))
+    for t in tokenize(node.title):
+        terms[t] += _TITLE_WEIGHT
+    return terms
+
+
+class LexicalIndex:
+    """
+    In-process BM25 inverted index over content titles and HTML-stripped bodies.
+
+    Updated incrementally: `update(tree)` re-tokenises only nodes whose title or text digest
+    changed since the previous snapshot and drops deleted ones, keeping document frequencies
+    and lengths in step.
+    """
+
+    def __init__(self) -> None:
+        self.generation = -1
+        self._postings: dict[str, dict[int, int]] = {}  # term → {doc id: term frequency}
+        self._docs: dict[int, tuple[str, str, Counter[str]]] = {}  # id → (title, digest, terms)
+        self._lengths: dict[int, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove(self, doc_id: int) -> None:
+        _title, _digest, terms = self._docs.pop(doc_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def _add(self, node: Content) -> None:
+        terms = _doc_terms(node)
+        self._docs[node.id] = (node.title, node.text_digest, terms)
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[node.id] = tf
+        self._lengths[node.id] = n = sum(terms.values())
+        self._total_length += n
+
+    def copy(self) -> LexicalIndex:
+        """Independent copy (documents' term counters are shared — they are never mutated)."""
+        other = LexicalIndex()
+        other.generation = self.generation
+        other._postings = {term: dict(posting) for term, posting in self._postings.items()}
+        other._docs = dict(self._docs)
+        other._lengths = dict(self._lengths)
+        other._total_length = self._total_length
+        return other
+
+    def update(self, tree: ContentTree) -> int:
+        """Bring the index in line with `tree`; returns how many documents were (re)indexed."""
+        for doc_id in [i for i in self._docs if i not in tree.nodes]:
+            self._remove(doc_id)
+        changed = 0
+        for node in tree.nodes.values():
+            indexed = self._docs.get(node.id)
+            if indexed is not None and indexed[:2] == (node.title, node.text_digest):
+                continue
+            if indexed is not None:
+                self._remove(node.id)
+            self._add(node)
+            changed += 1
+        self.generation = tree.generation
+        return changed
+
+    def search(self, query: str, top_k: int = 10) -> list[tuple[int, float]]:
+        """[(content id, BM25 score), …], best first."""
+        n_docs = len(self._docs)
+        if not n_docs:
+            return []
+        avg_length = self._total_length / n_docs or 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in posting.items():
+                norm = _K1 * (1.0 - _B + _B * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (_K1 + 1.0) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+
+
+_index: Optional[LexicalIndex] = None
+_build_tasks: dict[int, asyncio.Task] = {}  # generation → build in progress
+
+
+def _build(base: Optional[LexicalIndex], tree: ContentTree) -> tuple[LexicalIndex, int]:
+    # runs in a worker thread: works on a copy, the index searches read is never touched
+    index = base.copy() if base is not None else LexicalIndex()
+    return index, index.update(tree)
+
+
+async def refresh_lexical_index(tree: ContentTree) -> None:
+    """
+    Tokenise (only what changed) off the event loop, then swap the new index in. A slower
+    build of an older snapshot never replaces a newer index.
+    """
+    global _index
+    index, changed = await asyncio.to_thread(_build, _index, tree)
+    if _index is None or index.generation > _index.generation:
+        _index = index
+        logger.info(f"🔎 Lexical index: {changed} documents re-indexed, {len(index)} total")
+
+
+def _schedule(tree: ContentTree) -> None:
+    if tree.generation in _build_tasks:
+        return
+    if _index is not None and _index.generation >= tree.generation:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(refresh_lexical_index(tree))
+    _build_tasks[tree.generation] = task
+
+    def _done(t: asyncio.Task) -> None:
+        _build_tasks.pop(tree.generation, None)
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"Lexical index build failed: {t.exception()!r}")
+
+    task.add_done_callback(_done)
+
+
+# only the lexical backend reads the index (see search_content): don't build it otherwise
+if settings.ENABLE_LEXICAL_SEARCH and not settings.ENABLE_VECTOR_SEARCH:
+    on_tree_loaded(_schedule)
+
+
+def lexical_index() -> Optional[LexicalIndex]:
+    """
+    Index of the current content tree; while a newer one is being built, the previous index
+    keeps answering. None while the tree is not loaded or no index has been built yet.
+    """
+    tree = current_tree()
+    if tree is None:
+        return None
+    if _index is None or _index.generation != tree.generation:
+        _schedule(tree)
+    return _index
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from typing import Any, Literal, Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from src.tools.cache import TTLCache
+from src.tools.utils.utils_hash import digest
+
+EditResult = Literal["skipped", "markup", "text"]
+
+# (chat_id, message_id) → (text digest, markup digest) of what the message shows now
+_state = TTLCache(name="message_state", ttl_seconds=24 * 3600, maxsize=50_000)
+_counters = {"skipped": 0, "markup": 0, "text": 0, "not_modified": 0}
+
+
+def _markup_digest(markup: Optional[InlineKeyboardMarkup]) -> str:
+    if markup is None:
+        return ""
+    return digest(repr(tuple(
+        tuple((b.text, b.callback_data, b.url) for b in row) for row in markup.inline_keyboard
+    )))
+
+
+def _key(message: Message) -> tuple[int, int]:
+    return message.chat.id, message.message_id
+
+
+def remember(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup]) -> None:
+    """Record what a freshly sent message shows, so a later identical edit can be skipped."""
+    _state.set(_key(message), (digest(text), _markup_digest(reply_markup)))
+
+
+async def edit_text_if_changed(
+    message: Message,
+    text: str,
+    *,
+    reply_markup: Optional[InlineKeyboardMarkup] = None,
+    **kwargs: Any,
+) -> EditResult:
+    """
+    `message.edit_text`, minus the calls that would change nothing:
+      • same text and keyboard as last time → no Bot API call at all;
+      • only the keyboard differs            → `edit_reply_markup`;
+      • otherwise                            → `edit_text`.
+    The remembered state is trusted only while the keyboard in the incoming update matches it
+    (another replica or client may have edited the message since). "message is not modified"
+    counts as "skipped" — callers use that to not re-send follow-up chunks.
+    """
+    key = _key(message)
+    new = (digest(text), _markup_digest(reply_markup))
+    old = _state.get(key)
+    if old is not None and old[1] != _markup_digest(message.reply_markup):
+        old = None
+    if old is None and getattr(message, "text", None):
+        # nothing (valid) remembered, e.g. after a restart → the update itself shows the state
+        old = (digest(message.html_text), _markup_digest(message.reply_markup))
+
+    if old == new:
+        result: EditResult = "skipped"
+    else:
+        result = "markup" if old is not None and old[0] == new[0] else "text"
+        try:
+            if result == "markup":
+                await message.edit_reply_markup(reply_markup=reply_markup)
+            else:
+                await message.edit_text(text, reply_markup=reply_markup, **kwargs)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                _state.pop(key)
+                raise
+            _counters["not_modified"] += 1
+            result = "skipped"
+
+    _state.set(key, new)
+    _counters[result] += 1
+    return result
+
+
+def edit_stats() -> dict[str, int]:
+    return dict(_counters)
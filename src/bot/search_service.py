@@ -1,29 +1,108 @@
+import asyncio
+from typing import Awaitable, Sequence
+
 from loguru import logger
 from src.config import settings
-from src.bot.content_dao import get_content
+from src.bot.cache_layer import get_contents_many_cached
+from src.bot.content_dao import search_fts
+from src.bot.lexical_index import lexical_index
+
+_RRF_K = 60  # the usual reciprocal-rank-fusion constant: damps the weight of the very top ranks
 
 
 async def search_content(query: str, top_k: int = 2):
+    """
+    Yields (Content, score), best first. Backends: Postgres full-text + Qdrant fused
+    (ENABLE_VECTOR_SEARCH), otherwise the in-process BM25 index (ENABLE_LEXICAL_SEARCH);
+    with neither, no results.
+    """
     if not settings.ENABLE_VECTOR_SEARCH:
-        logger.info("Vector search disabled; skipping semantic search.")
-        return  # async generator with no results
+        if not settings.ENABLE_LEXICAL_SEARCH:
+            logger.info("Search disabled; skipping free-text search.")
+            return  # async generator with no results
+        async for hit in _search_lexical(query, top_k):
+            yield hit
+        return
+
+    async for hit in _search_hybrid(query, top_k):
+        yield hit
+
 
+async def _yield_items(hits: Sequence[tuple[int, float]], query: str):
+    # one query for all hits instead of one per hit; order of `hits` (by score) is kept
+    items, missing = await get_contents_many_cached([doc_id for doc_id, _score in hits])
+    if missing:
+        logger.warning(f"Search hits without content rows: {missing} for query: {query}")
+    by_id = {item.id: item for item in items}
+    for doc_id, score in hits:
+        if (item := by_id.get(doc_id)) is not None:
+            yield item, score
+
+
+async def _search_vector(query: str, limit: int) -> list[tuple[int, float]]:
     # Heavy imports only when needed
     from src.tools.embeddings import generate_embedding
     from src.tools.qdrant_high_level_client import client, QDRANT_COLLECTION
 
-    logger.info(f"Creating embedding for query: {query}")
     vector = await generate_embedding(query)
-    logger.info(f"Got vector with {len(vector)} dimensions for query: {query}")
     hits = await client.search(
         collection_name=QDRANT_COLLECTION,
         query_vector=vector,
-        limit=top_k,
+        limit=limit,
         search_params={"hnsw_ef": 256},
     )
+    return [(int(hit.id), hit.score) for hit in hits]
+
+
+def fuse_rankings(rankings: Sequence[Sequence[tuple[int, float]]]) -> list[tuple[int, float]]:
+    """
+    Reciprocal-rank fusion: every list adds 1 / (k + rank) for each id it contains. Only ranks
+    count, so FTS ranks and cosine scores need no common scale. Ties keep first-list order.
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _score) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (_RRF_K + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
+
+
+async def _search_hybrid(query: str, top_k: int):
+    """
+    Postgres FTS (exact terms, place names) and Qdrant (paraphrases) run concurrently under
+    one budget (SEARCH_BUDGET_SECONDS) and are fused with RRF. A backend that fails or does
+    not answer in time is cancelled and left out — search degrades to whichever one answered.
+    """
+    depth = max(top_k * 5, 20)  # fusion needs more than top_k candidates from each side
+    backends: dict[str, Awaitable[list[tuple[int, float]]]] = {
+        "fts": search_fts(query, depth),
+        "vector": _search_vector(query, depth),
+    }
+    tasks = {name: asyncio.create_task(coro) for name, coro in backends.items()}
+    done, pending = await asyncio.wait(tasks.values(), timeout=settings.SEARCH_BUDGET_SECONDS)
+    for task in pending:
+        task.cancel()
+    # wait for the cancellations: no unretrieved exceptions, no pool connection left checked out
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    rankings = []
+    for name, task in tasks.items():
+        if task not in done:
+            logger.warning(f"Search backend {name!r} exceeded the budget for query: {query}")
+        elif task.exception() is not None:
+            logger.warning(
+                f"Search backend {name!r} failed for query {query!r}: {task.exception()!r}"
+            )
+        else:
+            rankings.append(task.result())
+
+    async for hit in _yield_items(fuse_rankings(rankings)[:top_k], query):
+        yield hit
+
 
-    for hit in hits:
-        item = await get_content(int(hit.id))
-        logger.info(f"item: {item} for hit_id: {hit.id} for query: {query}")
-        if item:
-            yield item, hit.score
\ No newline at end of file
+async def _search_lexical(query: str, top_k: int):
+    index = lexical_index()
+    if index is None:
+        logger.info("Lexical search: index not built yet; no results.")
+        return
+    async for hit in _yield_items(index.search(query, top_k), query):
+        yield hit
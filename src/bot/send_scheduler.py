@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Hashable
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from loguru import logger
+
+from src.config import settings
+from src.tools.rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+# sends that are not messages: a typing indicator must not wait for (or use up) a message slot
+_UNPACED_SENDS = frozenset({"sendChatAction"})
+
+
+class _ChatState:
+    __slots__ = ("bucket", "lock")
+
+    def __init__(self, bucket: TokenBucket) -> None:
+        self.bucket = bucket
+        self.lock = asyncio.Lock()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Bot session middleware that paces outgoing calls to Telegram's flood limits.
+
+    • every message send (``send*`` with a ``chat_id``) takes a slot from its chat's bucket, then
+      from the global one; everything else — edits, deletes, chat actions, answerCallbackQuery,
+      getUpdates — is not paced, so menu navigation never waits behind a bucket;
+    • sends of one chat go out one at a time, in the order they were made (FIFO lock),
+      while different chats wait on their buckets concurrently;
+    • a 429 on any call pauses that chat's bucket (if any) for ``retry_after`` and the call is
+      retried (up to ``max_retries`` times) before the error reaches the handler.
+
+    Register it after ``OutgoingLoggingMiddleware`` so deliveries are logged once, after retries.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_per_second: float,
+        chat_per_second: float,
+        chat_burst: int,
+        group_per_minute: float,
+        max_retries: int = 3,
+        max_chats: int = 10_000,
+    ) -> None:
+        self._global = TokenBucket(global_per_second, burst=max(1, int(global_per_second)))
+        self._chat_per_second = chat_per_second
+        self._chat_burst = chat_burst
+        self._group_per_second = group_per_minute / 60.0
+        self._max_retries = max_retries
+        self._max_chats = max_chats
+        self._chats: dict[Hashable, _ChatState] = {}
+
+        self.pending = 0
+        self.max_pending = 0
+        self.dispatched = 0
+        self.sent = 0
+        self.retried = 0
+        self.gave_up = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _chat(self, chat_id: Hashable) -> _ChatState:
+        state = self._chats.get(chat_id)
+        if state is None:
+            if len(self._chats) >= self._max_chats:
+                self._forget_idle_chats()
+            # groups/channels (negative ids, @usernames) have a much lower limit than private chats
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            bucket = (
+                TokenBucket(self._chat_per_second, burst=self._chat_burst)
+                if is_private
+                else TokenBucket(self._group_per_second, burst=1)
+            )
+            state = self._chats[chat_id] = _ChatState(bucket)
+        return state
+
+    def _forget_idle_chats(self) -> None:
+        idle = [k for k, s in self._chats.items() if s.bucket.idle() and not s.lock.locked()]
+        for k in idle:
+            del self._chats[k]
+
+    def _retry_or_raise(
+        self, e: TelegramRetryAfter, method: TelegramMethod[Any], chat_id: Any, attempt: int
+    ) -> int:
+        if attempt >= self._max_retries:
+            self.gave_up += 1
+            raise e
+        attempt += 1
+        self.retried += 1
+        logger.warning(
+            f"429 for {type(method).__name__} in chat {chat_id}: "
+            f"retry {attempt}/{self._max_retries} in {e.retry_after}s"
+        )
+        if chat_id is not None:
+            self._chat(chat_id).bucket.pause(e.retry_after)
+        return attempt
+
+    async def _unpaced(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+        chat_id: Any,
+    ) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt = self._retry_or_raise(e, method, chat_id, attempt)
+                await asyncio.sleep(e.retry_after)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Any:
+        chat_id = getattr(method, "chat_id", None)
+        api_method = getattr(method, "__api_method__", "")
+        if chat_id is None or not api_method.startswith("send") or api_method in _UNPACED_SENDS:
+            return await self._unpaced(make_request, bot, method, chat_id)
+
+        state = self._chat(chat_id)
+        t0 = perf_counter()
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        queued = True
+        try:
+            async with state.lock:
+                attempt = 0
+                while True:
+                    # chat first: a global slot is only taken once this chat may send
+                    for bucket in (state.bucket, self._global):
+                        delay = bucket.reserve()
+                        if delay:
+                            await asyncio.sleep(delay)
+                    if queued:
+                        queued = False
+                        self.pending -= 1
+                        self.dispatched += 1
+                        waited = perf_counter() - t0
+                        self.wait_seconds_total += waited
+                        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+                    try:
+                        response = await make_request(bot, method)
+                    except TelegramRetryAfter as e:
+                        attempt = self._retry_or_raise(e, method, chat_id, attempt)
+                        continue
+                    self.sent += 1
+                    return response
+        finally:
+            if queued:
+                self.pending -= 1
+
+    def stats(self) -> dict[str, Any]:
+        n = self.dispatched
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "sent": self.sent,
+            "retried": self.retried,
+            "gave_up": self.gave_up,
+            "wait_avg_ms": round(self.wait_seconds_total / n * 1000, 2) if n else 0.0,
+            "wait_max_ms": round(self.wait_seconds_max * 1000, 2),
+            "chats": len(self._chats),
+        }
+
+
+send_scheduler = SendScheduler(
+    global_per_second=settings.SEND_GLOBAL_PER_SECOND,
+    chat_per_second=settings.SEND_CHAT_PER_SECOND,
+    chat_burst=settings.SEND_CHAT_BURST,
+    group_per_minute=settings.SEND_GROUP_PER_MINUTE,
+    max_retries=settings.SEND_MAX_RETRIES,
+)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+
+from src.bot.content_tree import ContentTree, current_tree, on_tree_loaded
+from src.tools.cache import MISSING, TTLCache
+
+_MAX_SUFFIX = 32  # longer queries are looked up by their first 32 chars, then filtered
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case-, ё- and whitespace-insensitive form used for both titles and queries."""
+    return _WS_RE.sub(" ", text.casefold().replace("ё", "е")).strip()
+
+
+@dataclass(frozen=True, slots=True)
+class TitleHit:
+    id: int
+    title: str       # button-clean title
+    breadcrumb: str  # ancestors, "Spain › Visa" (without the node itself)
+
+
+class TitleIndex:
+    """
+    Prefix/substring search over content titles — a suffix array: every suffix of every
+    normalised title (cut to `_MAX_SUFFIX` chars), sorted, so a query is a binary search plus
+    a scan over the matching range. Built from one content tree snapshot and never mutated.
+
+    Ranking: the title starts with the query → a word in it does → the query is inside a word;
+    then shorter titles first.
+    """
+
+    __slots__ = ("generation", "_suffixes", "_owners", "_titles", "_hits")
+
+    def __init__(self, tree: ContentTree) -> None:
+        self.generation = tree.generation
+        self._titles: dict[int, str] = {}
+        self._hits: dict[int, TitleHit] = {}
+        entries: list[tuple[str, int, int]] = []
+        for node_id, title in tree.clean_titles.items():
+            norm = normalize(title)
+            if not norm:
+                continue
+            self._titles[node_id] = norm
+            chain = tree.breadcrumbs.get(node_id, ())
+            self._hits[node_id] = TitleHit(
+                node_id, title, " › ".join(tree.clean_titles[c.id] for c in chain[:-1])
+            )
+            for pos in range(len(norm)):
+                if norm[pos] != " ":
+                    entries.append((norm[pos:pos + _MAX_SUFFIX], node_id, pos))
+        entries.sort()
+        self._suffixes = [e[0] for e in entries]
+        self._owners = [(e[1], e[2]) for e in entries]
+
+    def search(self, query: str, limit: int = 50) -> list[TitleHit]:
+        q = normalize(query)
+        if not q:
+            return []
+        probe = q[:_MAX_SUFFIX]
+        best: dict[int, int] = {}  # id → rank (0 prefix, 1 word start, 2 inside a word)
+        i = bisect_left(self._suffixes, probe)
+        while i < len(self._suffixes) and self._suffixes[i].startswith(probe):
+            node_id, pos = self._owners[i]
+            i += 1
+            title = self._titles[node_id]
+            if len(q) > _MAX_SUFFIX and not title.startswith(q, pos):
+                continue
+            rank = 0 if pos == 0 else 1 if title[pos - 1] == " " else 2
+            if rank < best.get(node_id, 3):
+                best[node_id] = rank
+        ranked = sorted(best, key=lambda n: (best[n], len(self._titles[n]), n))
+        return [self._hits[n] for n in ranked[:limit]]
+
+
+_index: Optional[TitleIndex] = None
+# (generation, normalised query) → hits; a new generation simply stops matching old keys
+_cache_search = TTLCache(name="title_search", ttl_seconds=600, maxsize=8192)
+
+
+def _rebuild(tree: ContentTree) -> None:
+    global _index
+    _index = TitleIndex(tree)
+
+
+on_tree_loaded(_rebuild)
+
+
+def title_index() -> Optional[TitleIndex]:
+    """
+    Index of the current content tree (built when the tree is loaded after a sync); None while
+    the tree is not loaded — inline search never falls back to Postgres.
+    """
+    tree = current_tree()
+    if tree is None:
+        return None
+    if _index is None or _index.generation != tree.generation:
+        _rebuild(tree)
+    return _index
+
+
+def search_titles_cached(query: str, limit: int = 50) -> list[TitleHit]:
+    """Inline-mode search: answered from the per-query cache or the in-memory index only."""
+    index = title_index()
+    if index is None:
+        return []
+    key = (index.generation, normalize(query), limit)
+    hits = _cache_search.get(key, MISSING)
+    if hits is MISSING:
+        hits = index.search(query, limit)
+        _cache_search.set(key, hits)
+    return hits
@@ -1,17 +1,38 @@
 # from loguru import logger
+from html import escape
+from typing import Awaitable, Callable, Optional
+
 from aiogram import F, Router
-from aiogram.filters import Command, CommandStart
-from aiogram.types import CallbackQuery, Message
+from aiogram.filters import Command, CommandObject, CommandStart
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Message,
+)
+from aiogram.utils.deep_linking import create_start_link
 
-from src.bot.keyboard import ROOT_BACK_ID, build_children_kb
+from src.bot.callbacks import Action, Callback, decode as decode_callback, open_data
+from src.bot.keyboard import build_children_kb
+from src.bot.message_edit import edit_text_if_changed, remember
 from src.bot.cache_layer import (
-    get_children_cached,
+    get_children_page_cached,
     get_content_cached,
     get_breadcrumb_cached,
+    get_node_view_cached,
     build_breadcrumb_text_cached,
+    category_kb_cached,
+    leaf_kb_cached,
     render_leaf_message_cached,
     _clean_for_btn_cached,
 )
+from src.bot.search_service import search_content
+from src.bot.title_index import search_titles_cached
+from src.config import settings
+from src.content import LEAF_MAX_LEN, body_chunks
 
 router = Router(name="user")
 
@@ -27,6 +48,38 @@ WELCOME = """Привет!
 # А еще наш бот умеет отвечать на твои открытые вопросы – просто задай свой вопрос, и бот подберёт для тебя наиболее подходящий ответ из нашей базы знаний.
 
 
+@router.message(CommandStart(deep_link=True))
+async def cmd_start_open(msg: Message, command: CommandObject) -> None:
+    """`/start open_<id>` — deep link from an inline-mode result: show that node right away."""
+    callback = decode_callback(command.args)
+    view = (
+        await get_node_view_cached(callback.item_id)
+        if callback is not None and callback.action is Action.OPEN
+        else None
+    )
+    if not view:
+        await msg.answer(WELCOME)
+        return
+
+    item = view.item
+    if view.children:  # category
+        breadcrumb = _clean_for_btn_cached(build_breadcrumb_text_cached(view.breadcrumb))
+        text = f"📂 <b>{breadcrumb}</b>"
+        kb = category_kb_cached(
+            item.id, view.children, item.parent_id, page=view.page, pages=view.pages
+        )
+        sent = await msg.answer(text, reply_markup=kb, disable_web_page_preview=True)
+        remember(sent, text, kb)
+        return
+
+    complete_text, extra_chunks = await render_leaf_message_cached(item, view.breadcrumb)
+    kb = leaf_kb_cached(item)  # no "save": there is no menu message to replace
+    sent = await msg.answer(complete_text, reply_markup=kb, disable_web_page_preview=True)
+    remember(sent, complete_text, kb)
+    for chunk in extra_chunks:
+        await msg.answer(chunk)
+
+
 @router.message(CommandStart())
 async def cmd_start(msg: Message) -> None:
     await msg.answer(WELCOME)
@@ -34,32 +87,32 @@ async def cmd_start(msg: Message) -> None:
 
 @router.message(Command("menu"))
 async def cmd_help(msg: Message) -> None:
-    roots = await get_children_cached(None)
-    await msg.answer(
-        "Выбирай страну, о которой хочешь узнать полезную информацию:",
-        reply_markup=build_children_kb(roots, parent_id=None, main_menu=True),
-        disable_web_page_preview=True
-    )
+    roots = await get_children_page_cached(None, 0)
+    text = "Выбирай страну, о которой хочешь узнать полезную информацию:"
+    kb = category_kb_cached(None, roots.items, None, page=roots.page, pages=roots.pages)
+    sent = await msg.answer(text, reply_markup=kb, disable_web_page_preview=True)
+    remember(sent, text, kb)
 
 
-@router.callback_query(F.data.startswith("open_"))
-async def cb_open(cb: CallbackQuery) -> None:
-    item_id = int(cb.data.removeprefix("open_"))
-    item = await get_content_cached(item_id)
-    # logger.info(f"Got {item}, parent_id = {getattr(item, 'parent_id', None)}")
-    if not item:
+async def cb_open(cb: CallbackQuery, callback: Callback) -> None:
+    item_id = callback.item_id
+    # item, breadcrumb and children in one round-trip (or straight from the caches)
+    view = await get_node_view_cached(item_id, callback.page)
+    if not view:
         await cb.answer("⚠️ Запись не найдена.", show_alert=True)
         return
 
-    breadcrumb_items = await get_breadcrumb_cached(item_id)
+    item, children, breadcrumb_items = view.item, view.children, view.breadcrumb
     breadcrumb = _clean_for_btn_cached(build_breadcrumb_text_cached(breadcrumb_items))
 
-    children = await get_children_cached(item.id)
     if children:  # category
         # logger.info(f"item: {item}")
-        await cb.message.edit_text(
+        await edit_text_if_changed(
+            cb.message,
             f"📂 <b>{breadcrumb}</b>",
-            reply_markup=build_children_kb(children, parent_id=item.parent_id),
+            reply_markup=category_kb_cached(
+                item.id, children, item.parent_id, page=view.page, pages=view.pages
+            ),
             disable_web_page_preview=True
         )
         await cb.answer()
@@ -69,57 +122,55 @@ async def cb_open(cb: CallbackQuery) -> None:
     # logger.info(f"item: {item}")
     # logger.info(f"message: {cb.message.message_id}")
 
-    complete_text, extra_chunks = render_leaf_message_cached(item, breadcrumb_items)
+    complete_text, extra_chunks = await render_leaf_message_cached(item, breadcrumb_items)
 
-    await cb.message.edit_text(
+    edited = await edit_text_if_changed(
+        cb.message,
         complete_text,
-        reply_markup=build_children_kb(
-            [],
-            parent_id=item.parent_id,  # keep real parent_id; root handled inside keyboard
-            current_id=item.id,
-            previous_menu_message_id=cb.message.message_id,
-        ),
+        # keep real parent_id; root handled inside keyboard
+        reply_markup=leaf_kb_cached(item, previous_menu_message_id=cb.message.message_id),
         disable_web_page_preview=True,
     )
-    for chunk in extra_chunks:
-        await cb.message.answer(chunk)
+    if edited != "skipped":  # repeated tap: the chunks are already in the chat
+        for chunk in extra_chunks:
+            await cb.message.answer(chunk)
 
     await cb.answer()  # remove loading state
 
 
-@router.callback_query(F.data == ROOT_BACK_ID)
-async def cb_home(cb: CallbackQuery) -> None:
-    roots = await get_children_cached(None)
-    await cb.message.edit_text(
+async def cb_home(cb: CallbackQuery, callback: Callback) -> None:
+    roots = await get_children_page_cached(None, callback.page)
+    kb = category_kb_cached(None, roots.items, None, page=roots.page, pages=roots.pages)
+    await edit_text_if_changed(
+        cb.message,
         "Выбирай страну, о которой хочешь узнать полезную информацию:",
-        reply_markup=build_children_kb(roots, parent_id=None, main_menu=True),
+        reply_markup=kb,
         disable_web_page_preview=True
     )
     await cb.answer()
 
 
-@router.callback_query(F.data.startswith("back_"))
-async def cb_back(cb: CallbackQuery) -> None:
-    parent_id = int(cb.data.removeprefix("back_"))
-    siblings = await get_children_cached(parent_id)
-    parent_obj = await get_content_cached(parent_id) if parent_id else None
-    breadcrumb_items = await get_breadcrumb_cached(parent_id)
+async def cb_back(cb: CallbackQuery, callback: Callback) -> None:
+    parent_id = callback.item_id
+    view = await get_node_view_cached(parent_id)
+    breadcrumb_items = view.breadcrumb if view else []
     breadcrumb = _clean_for_btn_cached(build_breadcrumb_text_cached(breadcrumb_items))
-    await cb.message.edit_text(
+    await edit_text_if_changed(
+        cb.message,
         f"📂 <b>{breadcrumb}</b>",
-        reply_markup=build_children_kb(
-            siblings,
-            parent_id=parent_obj.parent_id if parent_obj else None,
+        reply_markup=(
+            category_kb_cached(
+                parent_id, view.children, view.item.parent_id, page=view.page, pages=view.pages
+            )
+            if view else build_children_kb([], parent_id=None)
         ),
         disable_web_page_preview=True
     )
     await cb.answer()
 
 
-@router.callback_query(F.data.startswith("save_"))
-async def cb_save(cb: CallbackQuery) -> None:
-    item_id = int(cb.data.removeprefix("save_").split('_')[0])
-    prev_menu_message_id = int(cb.data.removeprefix("save_").split('_')[1])
+async def cb_save(cb: CallbackQuery, callback: Callback) -> None:
+    item_id, prev_menu_message_id = callback.item_id, callback.message_id
     item = await get_content_cached(item_id)
     # logger.info(f"Got {item}, parent_id = {getattr(item, 'parent_id', None)}")
     if not item:
@@ -127,7 +178,7 @@ async def cb_save(cb: CallbackQuery) -> None:
         return
 
     breadcrumb_items = await get_breadcrumb_cached(item_id)
-    complete_text, extra_chunks = render_leaf_message_cached(item, breadcrumb_items)
+    complete_text, extra_chunks = await render_leaf_message_cached(item, breadcrumb_items)
 
     # 1) Post a copy “as is” (the original “save into chat” behavior)
     await cb.message.answer(
@@ -141,56 +192,91 @@ async def cb_save(cb: CallbackQuery) -> None:
     await cb.bot.delete_message(chat_id=cb.message.chat.id, message_id=prev_menu_message_id)
     await cb.message.answer(
         text=complete_text,
-        reply_markup=build_children_kb(
-            [],
-            parent_id=item.parent_id,
-            current_id=item.id,
-            previous_menu_message_id=cb.message.message_id
-        ),
+        reply_markup=leaf_kb_cached(item, previous_menu_message_id=cb.message.message_id),
         disable_web_page_preview=True
     )
 
-# @router.message()
-# async def msg_search(msg: Message) -> None:
-#     """
-#     Handle free-text user queries:
-#     1. Embed the query, search Qdrant, fetch the best match.
-#     2. Send a short teaser + button which opens the full article.
-#     Robust against empty/HTML-stripped articles (no IndexError).
-#     """
-#     query = msg.text or ""
-#     # logger.info("msg_search: query=%r from user=%s", query, msg.from_user.id)
-#
-#     no_results = True
-#     async for item, score in search_content(query, top_k=1):
-#         # logger.debug("search hit: id=%s score=%s", item.id, score)
-#
-#         breadcrumb_items = await get_breadcrumb_cached(item.id)
-#         breadcrumb = _clean_for_btn_cached(" › ".join(i.title for i in breadcrumb_items))
-#
-#         raw_body = item.body or ""
-#
-#         safe_body = safe_html(raw_body)
-#         chunks = [remove_seo_hashtags(c).strip() for c in split_html_safe(safe_body, max_len=3800)]
-#
-#         if chunks:
-#             snippet_html = f"\n\n{chunks[0]}"
-#         else:
-#             # logger.warning(f"Empty body for content id={item.id}")
-#             snippet_html = ""
-#
-#         kb = InlineKeyboardMarkup(
-#             inline_keyboard=[
-#                 [InlineKeyboardButton(text="📖 Читать полностью", callback_data=f"open_{item.id}")]
-#             ]
-#         )
-#
-#         await msg.answer(
-#             f"🔎 <b>{breadcrumb}</b>{snippet_html}",
-#             reply_markup=kb,
-#             disable_web_page_preview=True,
-#         )
-#         no_results = False
-#
-#     if no_results:
-#         await msg.answer("Ничего не найдено 😕")
+
+@router.inline_query()
+async def inline_search(iq: InlineQuery) -> None:
+    """
+    @bot <title> in any chat: prefix/substring title search from the in-memory index
+    (no DB). A chosen result posts the node's path with a deep link back into the bot.
+    """
+    results = []
+    for hit in search_titles_cached(iq.query):
+        path = f"{hit.breadcrumb} › {hit.title}" if hit.breadcrumb else hit.title
+        link = await create_start_link(iq.bot, f"open_{hit.id}")
+        results.append(InlineQueryResultArticle(
+            id=str(hit.id),
+            title=hit.title,
+            description=hit.breadcrumb or None,
+            input_message_content=InputTextMessageContent(message_text=f"📂 <b>{escape(path)}</b>"),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="📖 Открыть в боте", url=link)]
+            ]),
+        ))
+    await iq.answer(results, cache_time=300)
+
+
+_CALLBACK_HANDLERS: dict[Action, Callable[[CallbackQuery, Callback], Awaitable[None]]] = {
+    Action.OPEN: cb_open,
+    Action.BACK: cb_back,
+    Action.HOME: cb_home,
+    Action.SAVE: cb_save,
+}
+
+
+@router.callback_query()
+async def on_callback(cb: CallbackQuery, callback: Optional[Callback] = None) -> None:
+    """Single entry for inline buttons: `callback` is decoded by CallbackDataMiddleware."""
+    handler = _CALLBACK_HANDLERS.get(callback.action) if callback is not None else None
+    if handler is None:  # unknown / malformed data (e.g. a keyboard from some older bot version)
+        await cb.answer()
+        return
+    await handler(cb, callback)
+
+
+async def msg_search(msg: Message) -> None:
+    """
+    Handle free-text user queries:
+    1. Search (Qdrant or the in-process BM25 index, see search_content), take the best match.
+    2. Send a short teaser + button which opens the full article.
+    Robust against empty/HTML-stripped articles (no IndexError).
+    """
+    query = msg.text or ""
+
+    no_results = True
+    async for item, score in search_content(query, top_k=1):
+        breadcrumb_items = await get_breadcrumb_cached(item.id)
+        breadcrumb = _clean_for_btn_cached(" › ".join(i.title for i in breadcrumb_items))
+
+        raw_body = item.body or ""
+
+        chunks = body_chunks(raw_body, LEAF_MAX_LEN)
+
+        if chunks:
+            snippet_html = f"\n\n{chunks[0]}"
+        else:
+            snippet_html = ""
+
+        kb = InlineKeyboardMarkup(
+            inline_keyboard=[
+                [InlineKeyboardButton(text="📖 Читать полностью", callback_data=open_data(item.id))]
+            ]
+        )
+
+        await msg.answer(
+            f"🔎 <b>{breadcrumb}</b>{snippet_html}",
+            reply_markup=kb,
+            disable_web_page_preview=True,
+        )
+        no_results = False
+
+    if no_results:
+        await msg.answer("Ничего не найдено 😕")
+
+
+# registered last: free text only, and only with a search backend (otherwise it stays unanswered)
+if settings.ENABLE_VECTOR_SEARCH or settings.ENABLE_LEXICAL_SEARCH:
+    router.message.register(msg_search, F.text, ~F.text.startswith("/"))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from time import perf_counter
+
+from loguru import logger
+
+from src.activity_log.repository import top_opened_content_ids
+from src.bot.cache_layer import (
+    get_breadcrumb_cached,
+    get_breadcrumbs_many_cached,
+    get_children_cached,
+    get_children_page_cached,
+    get_content_cached,
+    get_contents_many_cached,
+    render_leaf_message_cached,
+)
+from src.config import settings
+
+_CONCURRENCY = 4  # leave most of the 10-connection pool to live traffic
+
+
+@dataclass(slots=True)
+class WarmupReport:
+    requested: int = 0
+    categories: int = 0
+    leaves: int = 0
+    missing: int = 0
+    failed: int = 0
+    timed_out: bool = False
+    elapsed_s: float = 0.0
+
+    @property
+    def warmed(self) -> int:
+        return self.categories + self.leaves
+
+
+async def _warm_one(item_id: int, report: WarmupReport) -> None:
+    item = await get_content_cached(item_id)
+    if item is None:
+        report.missing += 1
+        return
+    breadcrumb_items = await get_breadcrumb_cached(item_id)
+    if await get_children_cached(item_id):
+        await get_children_page_cached(item_id, 0)  # the page cb_open shows first
+        report.categories += 1
+        return
+    await render_leaf_message_cached(item, breadcrumb_items)
+    report.leaves += 1
+
+
+async def warm_up(
+    *,
+    top_n: int = settings.WARMUP_TOP_N,
+    window_hours: int = settings.WARMUP_WINDOW_HOURS,
+    budget_s: float = settings.WARMUP_BUDGET_SECONDS,
+) -> WarmupReport:
+    """
+    Preload content, children, breadcrumbs and rendered messages of the most opened items
+    (from bot_user_activity_log) into the caches. Stops when `budget_s` runs out — whatever
+    was loaded by then stays cached. Never raises.
+    """
+    report = WarmupReport()
+    t0 = perf_counter()
+    try:
+        top = await asyncio.wait_for(
+            top_opened_content_ids(window_hours=window_hours, limit=top_n), timeout=budget_s
+        )
+        report.requested = len(top)
+
+        await get_children_page_cached(None, 0)  # root menu is always hot
+        # items and all chains in two statements instead of queries per item
+        ids = [cid for cid, _opens in top]
+        await get_contents_many_cached(ids)
+        await get_breadcrumbs_many_cached(ids)
+
+        sem = asyncio.Semaphore(_CONCURRENCY)
+
+        async def _guarded(item_id: int) -> None:
+            async with sem:
+                try:
+                    await _warm_one(item_id, report)
+                except Exception as e:
+                    report.failed += 1
+                    logger.debug(f"Warm-up of {item_id} failed: {e}")
+
+        tasks = [asyncio.create_task(_guarded(cid)) for cid in ids]
+        remaining = max(0.0, budget_s - (perf_counter() - t0))
+        if tasks:
+            _done, pending = await asyncio.wait(tasks, timeout=remaining)
+            if pending:
+                report.timed_out = True
+                for t in pending:
+                    t.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+    except asyncio.TimeoutError:
+        report.timed_out = True
+    except Exception as e:
+        logger.warning(f"Cache warm-up aborted: {e}")
+
+    report.elapsed_s = round(perf_counter() - t0, 3)
+    logger.info(
+        f"🔥 Cache warm-up: {report.warmed}/{report.requested} items "
+        f"({report.categories} categories, {report.leaves} leaves), "
+        f"missing={report.missing} failed={report.failed} "
+        f"timed_out={report.timed_out} in {report.elapsed_s}s"
+    )
+    return report
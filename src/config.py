@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 from pydantic import PostgresDsn
 from pydantic_settings import BaseSettings
@@ -15,6 +16,34 @@ class Settings(BaseSettings):
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: str = "6333"
     ENABLE_VECTOR_SEARCH: bool = False
+    # In-process BM25 search over the content tree (src/bot/lexical_index.py) — the free-text
+    # backend when vector search is off; no extra services needed
+    ENABLE_LEXICAL_SEARCH: bool = True
+    # With vector search: Postgres FTS and Qdrant run concurrently, whatever answered within
+    # this budget is fused (reciprocal-rank fusion)
+    SEARCH_BUDGET_SECONDS: float = 1.5
+
+    # Content caches (get_content/get_children/get_breadcrumb). By default entries live until the
+    # next content generation. Setting the soft TTL enables stale-while-revalidate: past it the
+    # cached value is served and refreshed in the background; past the hard TTL it is refetched.
+    CONTENT_CACHE_TTL_SECONDS: Optional[int] = None
+    CONTENT_CACHE_SOFT_TTL_SECONDS: Optional[int] = None
+
+    # Menus show at most this many child buttons per page (◀️ n/N ▶️ row to flip pages)
+    MENU_PAGE_SIZE: int = 20
+
+    # Startup warm-up: preload the most opened content of the last window before taking traffic
+    WARMUP_TOP_N: int = 300
+    WARMUP_WINDOW_HOURS: int = 24 * 7
+    WARMUP_BUDGET_SECONDS: float = 15.0
+
+    # Outgoing Bot API calls (src/bot/send_scheduler.py). Telegram allows about 30 messages/s
+    # overall, ~1/s per private chat (short bursts are fine) and 20/min per group.
+    SEND_GLOBAL_PER_SECOND: float = 25.0
+    SEND_CHAT_PER_SECOND: float = 1.0
+    SEND_CHAT_BURST: int = 3
+    SEND_GROUP_PER_MINUTE: float = 20.0
+    SEND_MAX_RETRIES: int = 3
 
     ADMINS: str
 
@@ -28,6 +57,11 @@ class Settings(BaseSettings):
     FULL_CONTENT_GOOGLE_DOCS_URL: str
     GOOGLE_SERVICE_ACCOUNT_BASE64: str
 
+    @property
+    def admin_ids(self) -> set[int]:
+        """Telegram ids from the comma-separated ADMINS variable."""
+        return {int(x) for x in self.ADMINS.split(",") if x.strip().lstrip("-").isdigit()}
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,9 +1,24 @@
 from src.content.parser import parse_lines_to_nodes
-from src.content.models import Content, ContentNode, SyncStats
-from src.content.renderer import build_breadcrumb_text, render_leaf_message
+from src.content.models import (
+    ChildrenPage,
+    Content,
+    ContentNode,
+    ContentSummary,
+    NodeView,
+    RenderedLeaf,
+    SyncStats,
+)
+from src.content.renderer import (
+    LEAF_MAX_LEN,
+    RENDER_VERSION,
+    body_chunks,
+    build_breadcrumb_text,
+    render_leaf_message,
+)
 
 __all__ = [
-    "Content", "ContentNode", "SyncStats",
+    "ChildrenPage", "Content", "ContentNode", "ContentSummary", "NodeView", "RenderedLeaf",
+    "SyncStats",
     "parse_lines_to_nodes",
-    "build_breadcrumb_text", "render_leaf_message",
+    "LEAF_MAX_LEN", "RENDER_VERSION", "body_chunks", "build_breadcrumb_text", "render_leaf_message",
 ]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+from loguru import logger
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Content generation: a monotonically increasing number bumped by every sync
+# that changed the `content` table (persisted in kv['content_generation']).
+# Process-local caches subscribe and switch over as soon as it moves forward.
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True, slots=True)
+class GenerationChange:
+    generation: int
+    # ids inserted/updated/moved/deleted by the sync; None → anything may have changed
+    changed_ids: Optional[frozenset[int]] = None
+    # parents whose child lists gained/lost/reordered entries (None = root level)
+    parent_ids: frozenset[Optional[int]] = frozenset()
+
+
+_current: int = 0
+_listeners: List[Callable[[GenerationChange], None]] = []
+
+
+def current_generation() -> int:
+    return _current
+
+
+def on_generation_change(callback: Callable[[GenerationChange], None]) -> None:
+    """Register a (synchronous) callback invoked with every accepted GenerationChange."""
+    _listeners.append(callback)
+
+
+def publish_generation(
+    generation: int,
+    changed_ids: Optional[Iterable[int]] = None,
+    parent_ids: Iterable[Optional[int]] = (),
+) -> bool:
+    """
+    Adopt `generation` if it is newer than the current one and notify listeners.
+    The change set is only trusted when it directly follows the current generation;
+    after a gap (missed notifications) listeners get a full flush instead.
+    Returns False (and does nothing) for stale or repeated generations.
+    """
+    global _current
+    if generation <= _current:
+        return False
+
+    if changed_ids is not None and generation == _current + 1:
+        change = GenerationChange(generation, frozenset(changed_ids), frozenset(parent_ids))
+    else:
+        change = GenerationChange(generation)
+
+    _current = generation
+    scope = "full flush" if change.changed_ids is None else f"{len(change.changed_ids)} changed ids"
+    logger.info(f"🔄 Content generation → {generation} ({scope})")
+    for cb in list(_listeners):
+        try:
+            cb(change)
+        except Exception as e:
+            logger.warning(f"Generation listener {cb!r} failed: {e}")
+    return True
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Sequence
 
 
 @dataclass(slots=True)
@@ -27,6 +27,47 @@ class Content:
     embedded_at: Optional[datetime]
 
 
+@dataclass(slots=True)
+class ContentSummary:
+    """What a menu button needs from a child — no body, no digests."""
+    id: int
+    title: str
+    ord: int
+    has_children: bool
+
+
+@dataclass(slots=True)
+class ChildrenPage:
+    """One page of a menu: `items` of page `page` (0-based) out of `pages`."""
+    items: Sequence[ContentSummary]
+    page: int = 0
+    pages: int = 1
+
+
+@dataclass(slots=True)
+class NodeView:
+    """
+    Everything a menu screen needs for one node: the node, its ordered children, its breadcrumb.
+    `children` holds page `page` of `pages` only (menus are paginated, see MENU_PAGE_SIZE).
+    """
+    item: Content
+    children: Sequence[ContentSummary]
+    breadcrumb: Sequence[Content]
+    page: int = 0
+    pages: int = 1
+
+
+@dataclass(slots=True)
+class RenderedLeaf:
+    content_id: int
+    text_digest: str
+    max_len: int
+    render_version: int
+    breadcrumb_text: str
+    complete_text: str
+    extra_chunks: List[str]
+
+
 @dataclass(slots=True)
 class SyncStats:
     inserted: int = 0
@@ -34,3 +75,4 @@ class SyncStats:
     moved: int = 0
     deleted: int = 0
     embedded: int = 0
+    rendered: int = 0
@@ -8,6 +8,9 @@ from loguru import logger
 
 from src.content.models import Content
 from src.tools.utils.utils_html import (
+    UnsupportedHtml,
+    drop_hashtags,
+    html_chunks,
     safe_html,
     split_html_safe,
     remove_seo_hashtags,
@@ -16,6 +19,14 @@ from src.tools.utils.utils_html import (
 
 _TAG_RE = re.compile(r"<[^>]+>")  # for plain-text fallback only
 
+# visible text per leaf chunk, in UTF-16 code units like Telegram's 4096 limit; the rest is
+# headroom for the breadcrumb line above the first chunk
+LEAF_MAX_LEN = 3600
+
+# stored renders (`content_rendered`) are reused only while this matches: bump it whenever
+# render_leaf_message can produce different output for the same body, breadcrumb and max_len
+RENDER_VERSION = 1
+
 
 def build_breadcrumb_text(items: List[Content]) -> str:
     """
@@ -39,11 +50,56 @@ def _first_chunk_with_fallback(first_chunk_html: str) -> str:
     return remove_seo_hashtags(first_chunk_html).strip()
 
 
+def _legacy_body_chunks(raw_body: str, max_len: int) -> List[str]:
+    chunks = split_html_safe(safe_html(raw_body), max_len=max_len)
+    return [remove_seo_hashtags(c).strip() for c in chunks]
+
+
+def body_chunks(raw_body: str, max_len: int = LEAF_MAX_LEN) -> List[str]:
+    """
+    Article body → Telegram-safe, hashtag-free, balanced chunks (empty list for an empty body).
+    Single-pass pipeline; bodies it does not cover exactly go through bleach + split_html_safe.
+    """
+    try:
+        return html_chunks(raw_body, max_len)[0]
+    except UnsupportedHtml as e:
+        logger.debug(f"body_chunks: legacy pipeline ({e})")
+        return _legacy_body_chunks(raw_body, max_len)
+
+
+def _render_single_pass(breadcrumb_text: str, raw_body: str, max_len: int) -> Tuple[str, List[str]]:
+    chunks, first_balanced = html_chunks(raw_body, max_len)
+    if not chunks:
+        chunks = ["…"]
+    # the pipeline knows whether the first chunk is balanced — re-parse only when it is not
+    if first_balanced:
+        first_chunk = drop_hashtags(chunks[0]).strip()
+    else:
+        first_chunk = _first_chunk_with_fallback(chunks[0])
+    complete_text = drop_hashtags(f"<b>{breadcrumb_text}</b>\n\n{first_chunk}")
+    return complete_text, [c for c in chunks[1:] if c]
+
+
+def _render_legacy(breadcrumb_text: str, raw_body: str, max_len: int) -> Tuple[str, List[str]]:
+    # Split into chunks respecting tag boundaries and Telegram limits
+    chunks = _legacy_body_chunks(raw_body, max_len)
+    if not chunks:
+        chunks = ["…"]
+
+    first_chunk = _first_chunk_with_fallback(chunks[0])
+    complete_text = remove_seo_hashtags(f"<b>{breadcrumb_text}</b>\n\n{first_chunk}")
+
+    # Remaining chunks are already cleaned above
+    extra_chunks = [c for c in chunks[1:] if c]
+
+    return complete_text, extra_chunks
+
+
 def render_leaf_message(
     item: Content,
     breadcrumb_items: List[Content],
     *,
-    max_len: int = 3800,
+    max_len: int = LEAF_MAX_LEN,
 ) -> Tuple[str, List[str]]:
     """
     Build the full text for a leaf node:
@@ -51,26 +107,17 @@ def render_leaf_message(
       • First content chunk
     Return (complete_text_for_edit_or_answer, extra_chunks_to_send_separately).
 
-    Behavior mirrors the previous handlers 1:1.
+    Output is the same for both pipelines: the single-pass one (`html_chunks`) handles the
+    HTML Google Docs sync produces; anything else (stray or unclosed tags, bare "&", "#" inside
+    a link…) is rendered by the legacy bleach → split → hashtag-regex chain.
     """
     # Breadcrumb
-    logger.info(f"breadcrumb_items: {breadcrumb_items}...")
     breadcrumb_text = build_breadcrumb_text(breadcrumb_items)
-    logger.info(f"build_breadcrumb_text: {breadcrumb_text}...")
+    logger.debug(f"build_breadcrumb_text: {breadcrumb_text}...")
 
-    # Body → safe HTML
     raw_body = item.body or "…"
-    body_safe = safe_html(raw_body)
-
-    # Split into chunks respecting tag boundaries and Telegram limits
-    chunks = [remove_seo_hashtags(c).strip() for c in split_html_safe(body_safe, max_len=max_len)]
-    if not chunks:
-        chunks = ["…"]
-
-    first_chunk = _first_chunk_with_fallback(chunks[0])
-    complete_text = remove_seo_hashtags(f"<b>{breadcrumb_text}</b>\n\n{first_chunk}")
-
-    # Remaining chunks are already cleaned above
-    extra_chunks = [c for c in chunks[1:] if c]
-
-    return complete_text, extra_chunks
+    try:
+        return _render_single_pass(breadcrumb_text, raw_body, max_len)
+    except UnsupportedHtml as e:
+        logger.debug(f"render_leaf_message: legacy pipeline for id={item.id} ({e})")
+        return _render_legacy(breadcrumb_text, raw_body, max_len)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from src.content.generation import current_generation, publish_generation
+from src.content.sync.storage import repository
+from src.tools.db import execute as pg_execute, listen_forever
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cross-replica cache invalidation: the replica that ran the sync NOTIFYs the
+# new generation and changed ids; every replica LISTENs and republishes it
+# in-process (see src/content/generation.py).
+# ──────────────────────────────────────────────────────────────────────────────
+CONTENT_CHANNEL = "content_changed"
+_MAX_PAYLOAD_BYTES = 7900  # Postgres rejects NOTIFY payloads of 8000 bytes and more
+
+
+def build_payload(
+    generation: int,
+    revision: str,
+    changed_ids: Iterable[int],
+    parent_ids: Iterable[Optional[int]],
+) -> str:
+    payload = json.dumps(
+        {
+            "generation": generation,
+            "revision": revision,
+            "ids": sorted(changed_ids),
+            "parents": sorted(parent_ids, key=lambda p: -1 if p is None else p),
+        },
+        separators=(",", ":"),
+    )
+    if len(payload.encode()) <= _MAX_PAYLOAD_BYTES:
+        return payload
+    # too many ids → replicas flush everything
+    return json.dumps({"generation": generation, "revision": revision, "ids": None})
+
+
+async def notify_content_changed(
+    generation: int,
+    revision: str,
+    changed_ids: Iterable[int],
+    parent_ids: Iterable[Optional[int]],
+) -> None:
+    payload = build_payload(generation, revision, changed_ids, parent_ids)
+    await pg_execute("SELECT pg_notify($1, $2);", CONTENT_CHANNEL, payload)
+
+
+def handle_notification(payload: str) -> None:
+    try:
+        msg = json.loads(payload)
+        generation = int(msg["generation"])
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed {CONTENT_CHANNEL} payload {payload!r}: {e}")
+        return
+    # a gap in generations is detected by publish_generation() → full flush
+    publish_generation(generation, msg.get("ids"), msg.get("parents") or ())
+
+
+async def _catch_up() -> None:
+    """After (re)connecting: anything committed while we were not listening → full flush."""
+    generation = await repository.get_content_generation()
+    if generation > current_generation():
+        logger.warning(
+            f"Missed content notifications (now at generation {generation}) – flushing caches"
+        )
+        publish_generation(generation)
+
+
+async def listen_for_content_changes() -> None:
+    await listen_forever(CONTENT_CHANNEL, handle_notification, on_connect=_catch_up)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+from loguru import logger
+
+from src.content.models import Content, RenderedLeaf, SyncStats
+from src.content.renderer import (
+    LEAF_MAX_LEN,
+    RENDER_VERSION,
+    build_breadcrumb_text,
+    render_leaf_message,
+)
+from src.content.sync.storage import repository
+
+
+def _breadcrumbs(nodes: dict[int, Content]) -> dict[int, list[Content]]:
+    """id → chain from the root down to the node (same shape as `get_breadcrumb`)."""
+    chains: dict[int, list[Content]] = {}
+
+    def chain(node_id: int) -> list[Content]:
+        if node_id in chains:
+            return chains[node_id]
+        path: list[Content] = []
+        current: Optional[Content] = nodes.get(node_id)
+        while current is not None and len(path) <= len(nodes):
+            path.append(current)
+            current = nodes.get(current.parent_id) if current.parent_id is not None else None
+        chains[node_id] = list(reversed(path))
+        return chains[node_id]
+
+    for nid in nodes:
+        chain(nid)
+    return chains
+
+
+def _render(todo: list[tuple[Content, list[Content], str]]) -> list[RenderedLeaf]:
+    out: list[RenderedLeaf] = []
+    for item, chain, breadcrumb_text in todo:
+        complete_text, extra_chunks = render_leaf_message(item, chain, max_len=LEAF_MAX_LEN)
+        out.append(
+            RenderedLeaf(
+                content_id=item.id,
+                text_digest=item.text_digest,
+                max_len=LEAF_MAX_LEN,
+                render_version=RENDER_VERSION,
+                breadcrumb_text=breadcrumb_text,
+                complete_text=complete_text,
+                extra_chunks=extra_chunks,
+            )
+        )
+    return out
+
+
+async def prerender_leaves(stats: SyncStats) -> None:
+    """
+    Render every leaf (node without children) into `content_rendered`, so handlers only read
+    the stored result. Incremental: a leaf is re-rendered only if its text_digest, breadcrumb,
+    chunk size or RENDER_VERSION changed. Rows of nodes that stopped being leaves are removed.
+    """
+    nodes = {c.id: c for c in await repository.list_all_content()}
+    parents = {c.parent_id for c in nodes.values()}
+    chains = _breadcrumbs(nodes)
+    existing = await repository.list_rendered_keys()
+
+    todo: list[tuple[Content, list[Content], str]] = []
+    for nid, item in nodes.items():
+        if nid in parents:
+            continue
+        breadcrumb_text = build_breadcrumb_text(chains[nid])
+        key = (item.text_digest, LEAF_MAX_LEN, RENDER_VERSION, breadcrumb_text)
+        if existing.get(nid) != key:
+            todo.append((item, chains[nid], breadcrumb_text))
+
+    not_leaves = [nid for nid in existing if nid in parents]
+    if not_leaves:
+        await repository.delete_rendered(not_leaves)
+
+    if not todo:
+        logger.info("🟢 Pre-rendered leaf messages are up to date.")
+        return
+
+    # bleach/splitting is pure CPU — keep it off the event loop that serves updates
+    rendered = await asyncio.to_thread(_render, todo)
+    await repository.upsert_rendered_leaves(rendered)
+    stats.rendered += len(rendered)
+    logger.success(f"✅ Pre-rendered {len(rendered)} leaf messages")
@@ -5,6 +5,9 @@ from loguru import logger
 from src.config import settings
 
 from src.content.models import SyncStats
+from src.content.generation import publish_generation
+from src.content.sync.notifications import notify_content_changed
+from src.content.sync.pipeline.prerender import prerender_leaves
 from src.content.sync.storage import repository
 from src.content.parser import parse_lines_to_nodes
 from src.content.sync.sources.google_docs import fetch_document
@@ -12,19 +15,27 @@ from src.content.sync.sources.google_docs import fetch_document
 
 
 async def _walk_and_upsert(parent_id: int | None, node, ord_idx: int, force_reembed: bool, out_seen: set[int],
-                           out_embeds: list[tuple[int, str, str, bool]], stats: SyncStats) -> int:
-    cid, need_emb, is_new, updated_changed = await repository.upsert_node(
+                           out_embeds: list[tuple[int, str, str, bool]], stats: SyncStats,
+                           out_changed: set[int], out_parents: set[int | None],
+                           parent_path: tuple[int, ...] = ()) -> int:
+    cid, need_emb, is_new, updated_changed, moved = await repository.upsert_node(
         parent_id=parent_id,
         ord_=ord_idx,
         title=node.title,
         body=node.body,
         force_reembed_all=force_reembed,
+        parent_path=parent_path,
     )
 
     if is_new:
         stats.inserted += 1
     if updated_changed:
         stats.updated += 1
+    if moved:
+        stats.moved += 1
+    if is_new or updated_changed or moved:
+        out_changed.add(cid)
+        out_parents.add(parent_id)
 
     # Prepare embeddings payload when needed
     if need_emb:
@@ -34,18 +45,23 @@ async def _walk_and_upsert(parent_id: int | None, node, ord_idx: int, force_reem
     out_seen.add(cid)
 
     for i, child in enumerate(node.children):
-        await _walk_and_upsert(cid, child, i, force_reembed, out_seen, out_embeds, stats)
+        await _walk_and_upsert(cid, child, i, force_reembed, out_seen, out_embeds, stats,
+                               out_changed, out_parents, parent_path + (cid,))
 
     return cid
 
 
 async def run_once(force_reembed_all_if_empty: bool = True) -> SyncStats:
     """
-    Orchestrates: fetch → rev check → early rev write → parse → db upsert → delete missing → embed+upsert.
+    Orchestrates: fetch → rev check → early rev write → parse → db upsert → delete missing →
+    pre-render leaves → publish new content generation (+ NOTIFY other replicas) → embed+upsert.
     Returns SyncStats for observability.
     """
     stats = SyncStats()
 
+    # 0) adopt the persisted generation so this process' caches line up with the DB
+    publish_generation(await repository.get_content_generation())
+
     # 1) figure out doc_id from settings URL
     doc_id = settings.FULL_CONTENT_GOOGLE_DOCS_URL.split("/")[-1]
 
@@ -65,6 +81,9 @@ async def run_once(force_reembed_all_if_empty: bool = True) -> SyncStats:
 
     if new_rev == prev_rev:
         logger.info("🟢 Google Doc revision unchanged – skipping synchronisation.")
+        # still fill in leaves missing from content_rendered or stored with an older
+        # RENDER_VERSION (fresh migration, renderer change)
+        await prerender_leaves(stats)
         return stats
 
     # 4) early update the revision to avoid infinite loops on crashes
@@ -77,21 +96,41 @@ async def run_once(force_reembed_all_if_empty: bool = True) -> SyncStats:
     # 6) upsert all nodes; collect candidates for embedding
     seen_ids: set[int] = set()
     embed_candidates: list[tuple[int, str, str, bool]] = []
+    changed_ids: set[int] = set()
+    changed_parents: set[int | None] = set()
 
     for idx, root in enumerate(nodes):
-        await _walk_and_upsert(None, root, idx, force_reembed, seen_ids, embed_candidates, stats)
+        await _walk_and_upsert(None, root, idx, force_reembed, seen_ids, embed_candidates, stats,
+                               changed_ids, changed_parents)
 
-    # 7) delete rows that disappeared + delete their vectors
-    all_ids = set(await repository.list_all_content_ids())
-    to_delete = list(all_ids - seen_ids)
+    # 7) delete rows that disappeared + delete their vectors: each removed subtree goes in one
+    #    indexed `path` lookup from its root; rows without a maintained path are deleted by id
+    parents = await repository.list_content_parents()
+    to_delete = [i for i in parents if i not in seen_ids]
     if to_delete:
-        await repository.delete_content_ids(to_delete)
+        gone = set(to_delete)
+        deleted: set[int] = set()
+        for root in (i for i in to_delete if parents[i] not in gone):
+            deleted.update(await repository.delete_subtree(root))
+        leftover = [i for i in to_delete if i not in deleted]
+        if leftover:
+            await repository.delete_content_ids(leftover)
         if settings.ENABLE_VECTOR_SEARCH:
             from src.content.sync.vectorstore.qdrant_store import delete_points
             await delete_points(to_delete)
         stats.deleted += len(to_delete)
+        changed_ids.update(to_delete)
         logger.info(f"🗑️  Deleted {len(to_delete)} obsolete rows and vectors")
 
+    # 7.1) render leaf messages once, before caches switch to the new content
+    await prerender_leaves(stats)
+
+    # 7.2) content is committed → bump generation; caches switch over immediately,
+    #      other replicas learn about it via NOTIFY
+    generation = await repository.bump_content_generation()
+    publish_generation(generation, changed_ids, changed_parents)
+    await notify_content_changed(generation, new_rev, changed_ids, changed_parents)
+
     # 8) embed + upsert to Qdrant
     if settings.ENABLE_VECTOR_SEARCH and embed_candidates:
         from qdrant_client.http.models import PointStruct
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
-from src.tools.db import fetchrow, fetch, execute as pg_execute
+from src.content.models import Content, RenderedLeaf
+from src.tools.db import fetchrow, fetch, execute as pg_execute, executemany
 from src.tools.utils.utils_hash import digest
 
 
@@ -22,15 +23,91 @@ async def set_doc_revision(new_rev: str) -> None:
     )
 
 
-async def list_all_content_ids() -> list[int]:
-    rows = await fetch("SELECT id FROM content;")
-    return [r["id"] for r in rows]
+async def get_content_generation() -> int:
+    row = await fetchrow("SELECT value FROM kv WHERE key = 'content_generation';")
+    return int(row["value"]) if row else 0
+
+
+async def bump_content_generation() -> int:
+    """Atomically increment kv['content_generation'] and return the new value."""
+    row = await fetchrow(
+        """
+        INSERT INTO kv(key, value) VALUES ('content_generation', '1')
+        ON CONFLICT (key) DO UPDATE SET value = (kv.value::bigint + 1)::text
+        RETURNING value;
+        """
+    )
+    return int(row["value"])
+
+
+async def list_content_parents() -> dict[int, Optional[int]]:
+    """id → parent_id of every row."""
+    rows = await fetch("SELECT id, parent_id FROM content;")
+    return {r["id"]: r["parent_id"] for r in rows}
 
 
 async def delete_content_ids(ids: list[int]) -> None:
     await pg_execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", ids)
 
 
+async def delete_subtree(root_id: int) -> list[int]:
+    """Delete `root_id` and everything under it in one statement (GIN on `path`).
+
+    Returns the deleted ids.
+    """
+    rows = await fetch(
+        "DELETE FROM content WHERE path @> ARRAY[$1]::bigint[] RETURNING id;", root_id
+    )
+    return [r["id"] for r in rows]
+
+
+async def list_all_content() -> list[Content]:
+    # columns in Content field order → positional decoding, no kwargs dict per row
+    rows = await fetch(
+        "SELECT id, parent_id, title, body, ord, text_digest, embedded_at FROM content;"
+    )
+    return [Content(*r) for r in rows]
+
+
+async def list_rendered_keys() -> dict[int, tuple[str, int, int, str]]:
+    """content_id → (text_digest, max_len, render_version, breadcrumb_text) already rendered."""
+    rows = await fetch(
+        "SELECT content_id, text_digest, max_len, render_version, breadcrumb_text "
+        "FROM content_rendered;"
+    )
+    return {r[0]: (r[1], r[2], r[3], r[4]) for r in rows}
+
+
+async def upsert_rendered_leaves(leaves: Iterable[RenderedLeaf]) -> None:
+    await executemany(
+        """
+        INSERT INTO content_rendered
+            (content_id, text_digest, max_len, render_version, breadcrumb_text, complete_text,
+             extra_chunks)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (content_id) DO UPDATE SET
+            text_digest     = EXCLUDED.text_digest,
+            max_len         = EXCLUDED.max_len,
+            render_version  = EXCLUDED.render_version,
+            breadcrumb_text = EXCLUDED.breadcrumb_text,
+            complete_text   = EXCLUDED.complete_text,
+            extra_chunks    = EXCLUDED.extra_chunks,
+            rendered_at     = now();
+        """,
+        [
+            (
+                r.content_id, r.text_digest, r.max_len, r.render_version, r.breadcrumb_text,
+                r.complete_text, r.extra_chunks,
+            )
+            for r in leaves
+        ],
+    )
+
+
+async def delete_rendered(ids: list[int]) -> None:
+    await pg_execute("DELETE FROM content_rendered WHERE content_id = ANY($1::bigint[]);", ids)
+
+
 async def upsert_node(
     *,
     parent_id: Optional[int],
@@ -38,17 +115,20 @@ async def upsert_node(
     title: str,
     body: Optional[str],
     force_reembed_all: bool,
-) -> Tuple[int, bool, bool, bool]:
+    parent_path: Sequence[int] = (),
+) -> Tuple[int, bool, bool, bool, bool]:
     """
     Insert or update one content row by the natural key (parent_id, ord).
-    Returns: (id, need_embedding, is_new, updated_changed)
+    `parent_path` is the parent's materialised path; the row's own `path` becomes
+    parent_path + [id] (rewritten only when it differs).
+    Returns: (id, need_embedding, is_new, updated_changed, moved)
     """
     txt = (body or title or "")
     dg = digest(txt)
 
     row = await fetchrow(
         """
-        SELECT id, text_digest, parent_id, ord
+        SELECT id, text_digest, parent_id, ord, path
           FROM content
          WHERE parent_id IS NOT DISTINCT FROM $1
            AND ord = $2;
@@ -60,12 +140,16 @@ async def upsert_node(
     need_embedding = force_reembed_all
     is_new = False
     updated_changed = False
+    moved = False
 
     if row is None:
+        # take the id first, so the row is inserted with its final path in one statement
         inserted = await fetchrow(
             """
-            INSERT INTO content (parent_id, title, body, ord, text_digest, embedded_at)
-            VALUES ($1, $2, $3, $4, $5, $6)
+            WITH nid AS (SELECT nextval(pg_get_serial_sequence('content', 'id')) AS id)
+            INSERT INTO content (id, parent_id, title, body, ord, text_digest, embedded_at, path)
+            SELECT nid.id, $1, $2, $3, $4, $5, $6, $7::bigint[] || nid.id
+              FROM nid
             RETURNING id;
             """,
             parent_id,
@@ -74,6 +158,7 @@ async def upsert_node(
             ord_,
             dg,
             datetime.now(tz=timezone.utc),
+            list(parent_path),
         )
         cid = inserted["id"]
         need_embedding = True
@@ -103,5 +188,10 @@ async def upsert_node(
         # Keep no-op "move" check identical to previous code path (safe)
         if row["parent_id"] != parent_id or row["ord"] != ord_:
             await pg_execute("UPDATE content SET parent_id = $2, ord = $3 WHERE id = $1;", cid, parent_id, ord_)
+            moved = True
+
+        path = [*parent_path, cid]
+        if list(row["path"]) != path:
+            await pg_execute("UPDATE content SET path = $2 WHERE id = $1;", cid, path)
 
-    return cid, need_embedding, is_new, updated_changed
+    return cid, need_embedding, is_new, updated_changed, moved
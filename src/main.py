@@ -15,7 +15,14 @@ from src.tools.logger import logger
 from src.tools.db import fetchrow, init_pool
 from src.config import settings, project_root_path
 from src.content.sync.pipeline.sync import run_once
+from src.content.sync.notifications import listen_for_content_changes
 from src.bot.user_router import router as user_router
+from src.bot.admin_router import router as admin_router
+from src.bot.callbacks import CallbackDataMiddleware
+from src.bot.cache_layer import get_cache_stats
+from src.bot.send_scheduler import send_scheduler
+from src.bot.content_tree import refresh_content_tree
+from src.bot.warmup import warm_up
 from src.tools.qdrant_high_level_client import ensure_collection
 from src.activity_log import UserActionsLogMiddleware, OutgoingLoggingMiddleware
 
@@ -23,8 +30,12 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 
 dp = Dispatcher()
+dp.include_router(admin_router)
 dp.include_router(user_router)
 
+# long-running tasks started from main(); referenced here so they are not garbage-collected
+_background_tasks: set[asyncio.Task] = set()
+
 
 @dp.errors()
 async def on_error(event: ErrorEvent) -> bool:
@@ -54,10 +65,28 @@ async def ping(message: Message):
     logger.info(f"DB check returned: {row['ok']}")
 
 
+async def cache_metrics(request: web.Request) -> web.Response:
+    """Cache counters as JSON; protected by the webhook secret (X-Metrics-Token header)."""
+    if request.headers.get("X-Metrics-Token") != settings.WEBHOOK_SECRET:
+        raise web.HTTPForbidden()
+    return web.json_response(get_cache_stats())
+
+
+async def send_metrics(request: web.Request) -> web.Response:
+    """Outgoing send scheduler: queue depth, wait times, 429 retries (same token as above)."""
+    if request.headers.get("X-Metrics-Token") != settings.WEBHOOK_SECRET:
+        raise web.HTTPForbidden()
+    return web.json_response(send_scheduler.stats())
+
+
 async def main():
     bot = Bot(settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
+    # decode callback data once per update, before anything (activity log, handlers) reads it
+    dp.update.outer_middleware(CallbackDataMiddleware())
     dp.update.outer_middleware(UserActionsLogMiddleware())
     bot.session.middleware(OutgoingLoggingMiddleware())
+    # innermost: paces every call to Telegram's flood limits, retries 429s
+    bot.session.middleware(send_scheduler)
 
     try:
         if settings.ENABLE_VECTOR_SEARCH:
@@ -67,6 +96,17 @@ async def main():
         except HttpError as e:
             logger.info(f"Google docs API returned an error: {e}")
 
+        try:
+            await refresh_content_tree()
+        except Exception as e:
+            logger.warning(f"Content tree not loaded, serving content from DB: {e}")
+
+        # other replicas' syncs → invalidate our caches (keeps a dedicated LISTEN connection)
+        _background_tasks.add(asyncio.create_task(listen_for_content_changes()))
+
+        # preload popular content before the first update arrives (bounded by a time budget)
+        await warm_up()
+
         if settings.RUNNING_ENV == "LOCAL":
             logger.info("Running in LOCAL mode with long polling.")
             await init_pool()
@@ -80,6 +120,8 @@ async def main():
                 dispatcher=dp, bot=bot, secret_token=settings.WEBHOOK_SECRET
             )
             webhook_request_handler.register(app, path=settings.WEBHOOK_PATH)
+            app.router.add_get("/metrics/cache", cache_metrics)
+            app.router.add_get("/metrics/send", send_metrics)
             setup_application(app, dp, bot=bot)
 
             runner = web.AppRunner(app)
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import sys
+import time
+from collections import OrderedDict, deque
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Hashable, Optional
+
+# Sentinel for "key is not cached" — lets callers tell a miss apart from a cached ``None``.
+MISSING: Any = object()
+
+# name → cache, for introspection (see `cache_stats()`)
+_registry: dict[str, "TTLCache"] = {}
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Rough, cheap estimate of the memory held by a cached value (bytes).
+    Follows strings, containers and (slotted) dataclasses one level deep per item;
+    good enough for bounding the cache, not for exact accounting.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return sys.getsizeof(value)
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        items = sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+        return sys.getsizeof(value) + items
+    if is_dataclass(value):
+        attrs = sum(estimate_size(getattr(value, f.name)) for f in fields(value))
+        return sys.getsizeof(value) + attrs
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_at", "size")
+
+    def __init__(
+        self, value: Any, expires_at: Optional[float], stale_at: Optional[float], size: int
+    ) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_at = stale_at
+        self.size = size
+
+
+class TTLCache:
+    """
+    LRU cache with per-entry expiry, bounded by entry count and (optionally) estimated bytes.
+
+    • Recency is tracked by an ``OrderedDict`` (O(1) touch / evict-oldest).
+    • Expiry uses one FIFO queue per TTL value: with a fixed TTL, expiry times are
+      monotonic in insertion order, so expired entries always sit at the head of
+      their queue and purging is amortized O(1) — no full scans on ``set()``.
+      Queue items of overwritten/evicted keys are skipped lazily.
+    • ``None`` values are cached for ``negative_ttl_seconds`` (negative caching);
+      use ``get(key, MISSING)`` to distinguish a cached ``None`` from a miss.
+    • Entries belong to a content *generation*: ``advance_generation()`` drops them all
+      at once, and ``set(..., generation=g)`` ignores values loaded for an older one.
+    • Named caches register themselves for ``cache_stats()`` (hits, misses, expirations,
+      evictions, load latency reported via ``record_load()``, size and bytes).
+    • Optional stale-while-revalidate: past ``soft_ttl_seconds`` an entry is still served,
+      but ``lookup()`` flags it as stale so the caller can refresh it in the background;
+      past ``ttl_seconds`` (the hard TTL) it is gone.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = 120,
+        maxsize: int = 1024,
+        *,
+        name: Optional[str] = None,
+        soft_ttl_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        negative_ttl_seconds: Optional[float] = 60,
+        sizeof: Callable[[Any], int] = estimate_size,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl_seconds
+        self.soft_ttl = soft_ttl_seconds
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl_seconds
+        self._sizeof = sizeof
+        self._timer = timer
+        self._store: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._queues: dict[float, deque[tuple[float, Hashable]]] = {}
+        self._bytes = 0
+        self._generation = 0
+
+        self.name = name
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.loads = 0
+        self.load_seconds_total = 0.0
+        self.load_seconds_max = 0.0
+        if name is not None:
+            _registry[name] = self
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._store.get(key)
+        return entry is not None and (entry.expires_at is None or entry.expires_at > self._timer())
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def advance_generation(self, generation: int, *, flush: bool = True) -> bool:
+        """
+        Switch to a newer generation. With ``flush`` every entry is dropped; without it
+        the caller has already discarded the affected keys. Returns False if not newer.
+        """
+        if generation <= self._generation:
+            return False
+        self._generation = generation
+        if flush:
+            self.clear()
+        return True
+
+    def _drop(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._store.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _purge_expired(self, now: float) -> None:
+        for ttl, queue in self._queues.items():
+            while queue and queue[0][0] <= now:
+                exp, key = queue.popleft()
+                entry = self._store.get(key)
+                # only drop if the queue item still describes the live entry
+                if entry is not None and entry.expires_at == exp:
+                    self._drop(key)
+                    self.expirations += 1
+            # compact queues bloated by overwrites of long-lived keys
+            if len(queue) > 2 * len(self._store) + 64:
+                self._queues[ttl] = deque(
+                    (exp, key)
+                    for exp, key in queue
+                    if (e := self._store.get(key)) is not None and e.expires_at == exp
+                )
+
+    def _enforce_bounds(self) -> None:
+        while len(self._store) > self.maxsize:
+            _, entry = self._store.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+        if self.max_bytes is not None:
+            while self._bytes > self.max_bytes and self._store:
+                _, entry = self._store.popitem(last=False)
+                self._bytes -= entry.size
+                self.evictions += 1
+
+    def lookup(self, key: Hashable) -> tuple[Any, bool]:
+        """Return ``(value, is_stale)``; ``(MISSING, False)`` on a miss."""
+        entry = self._store.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING, False
+        now = self._timer()
+        if entry.expires_at is not None and entry.expires_at <= now:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return MISSING, False
+        self._store.move_to_end(key)
+        self.hits += 1
+        stale = entry.stale_at is not None and entry.stale_at <= now
+        if stale:
+            self.stale_hits += 1
+        return entry.value, stale
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value, _ = self.lookup(key)
+        return default if value is MISSING else value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        *,
+        ttl_seconds: Optional[float] = MISSING,
+        generation: Optional[int] = None,
+    ) -> None:
+        # value was loaded before a sync finished → it may already be stale
+        if generation is not None and generation < self._generation:
+            return
+        if ttl_seconds is MISSING:
+            ttl_seconds = self.negative_ttl if value is None else self.ttl
+
+        now = self._timer()
+        expires_at = None if ttl_seconds is None else now + ttl_seconds
+        stale_at = None if self.soft_ttl is None else now + self.soft_ttl
+
+        self._drop(key)
+        entry = _Entry(value, expires_at, stale_at, self._sizeof(value))
+        self._store[key] = entry
+        self._bytes += entry.size
+
+        if expires_at is not None:
+            queue = self._queues.get(ttl_seconds)
+            if queue is None:
+                queue = self._queues[ttl_seconds] = deque()
+            queue.append((expires_at, key))
+
+        self._purge_expired(now)
+        self._enforce_bounds()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._drop(key)
+        return default if entry is None else entry.value
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drop every entry for which ``predicate(key, value)`` is true (full scan).
+
+        Returns how many were dropped.
+        """
+        doomed = [k for k, e in self._store.items() if predicate(k, e.value)]
+        for k in doomed:
+            self._drop(k)
+        return len(doomed)
+
+    def clear(self) -> None:
+        self._store.clear()
+        self._queues.clear()
+        self._bytes = 0
+
+    def record_load(self, seconds: float) -> None:
+        """Account one backing-store load (the caller measures it)."""
+        self.loads += 1
+        self.load_seconds_total += seconds
+        self.load_seconds_max = max(self.load_seconds_max, seconds)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._store),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "soft_ttl": self.soft_ttl,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "stale_hits": self.stale_hits,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "loads": self.loads,
+            "load_ms_avg": (
+                round(1000 * self.load_seconds_total / self.loads, 3) if self.loads else None
+            ),
+            "load_ms_max": round(1000 * self.load_seconds_max, 3),
+        }
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Snapshot of counters for every named cache."""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -1,4 +1,6 @@
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
 
 import asyncpg
 from loguru import logger
@@ -6,11 +8,13 @@ from loguru import logger
 from src.config import settings
 
 _pool: asyncpg.Pool | None = None
+_postgres_url: str = str(settings.POSTGRES_URL)
 
 
 async def init_pool(postgres_url: str = settings.POSTGRES_URL):
-    global _pool
+    global _pool, _postgres_url
     if _pool is None:
+        _postgres_url = str(postgres_url)
         logger.info("Connecting to Postgres …")
         _pool = await asyncpg.create_pool(str(postgres_url), min_size=2, max_size=10)
         logger.success("Postgres connection pool ready")
@@ -37,3 +41,54 @@ async def fetch(sql: str, *args, **kwargs):
 async def execute(sql: str, *args, **kwargs):
     async with get_conn() as conn:
         return await conn.execute(sql, *args, **kwargs)
+
+
+async def executemany(sql: str, args, **kwargs):
+    async with get_conn() as conn:
+        return await conn.executemany(sql, args, **kwargs)
+
+
+async def listen_forever(
+    channel: str,
+    on_notify: Callable[[str], Any],
+    *,
+    on_connect: Callable[[], Awaitable[None]] | None = None,
+    health_interval: float = 30.0,
+) -> None:
+    """
+    Hold a dedicated (non-pool) connection with LISTEN `channel` and call `on_notify(payload)`
+    for every notification. Reconnects with exponential backoff; `on_connect` runs after
+    every (re)connect so the caller can catch up on anything sent while we were away.
+    Runs until cancelled.
+    """
+    backoff = 1.0
+    while True:
+        conn: asyncpg.Connection | None = None
+        try:
+            conn = await asyncpg.connect(_postgres_url)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _c: lost.set())
+            await conn.add_listener(channel, lambda _c, _pid, _ch, payload: on_notify(payload))
+            logger.success(f"LISTEN {channel} ready")
+            backoff = 1.0
+
+            if on_connect is not None:
+                await on_connect()
+
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), timeout=health_interval)
+                except asyncio.TimeoutError:
+                    # half-open TCP connections never fire the termination listener
+                    await conn.execute("SELECT 1;", timeout=10)
+            logger.warning(f"LISTEN {channel}: connection lost")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"LISTEN {channel} failed ({e!r}), reconnecting in {backoff:.0f}s")
+        finally:
+            if conn is not None and not conn.is_closed():
+                conn.terminate()
+
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60.0)
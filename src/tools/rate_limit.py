@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Token bucket in its "virtual scheduling" form (GCRA): instead of counting tokens it keeps
+    the theoretical arrival time of the next request, so ``reserve()`` is O(1), never blocks
+    and hands out slots in call order — callers just sleep for the returned delay. That lets
+    many senders queue on one bucket concurrently without a lock.
+
+    • ``rate``  — sustained requests per second
+    • ``burst`` — requests allowed back to back after the bucket has been idle
+    """
+
+    __slots__ = ("_interval", "_tolerance", "_tat", "_timer")
+
+    def __init__(
+        self, rate: float, burst: int = 1, *, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be > 0 and burst >= 1")
+        self._interval = 1.0 / rate
+        self._tolerance = (burst - 1) * self._interval
+        self._timer = timer
+        self._tat = timer()
+
+    def reserve(self) -> float:
+        """Take the next slot; returns how long to wait (seconds) before using it."""
+        now = self._timer()
+        tat = max(self._tat, now)
+        self._tat = tat + self._interval
+        return max(0.0, tat - self._tolerance - now)
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no slot earlier than `seconds` from now (e.g. Telegram's retry_after)."""
+        self._tat = max(self._tat, self._timer() + seconds + self._tolerance)
+
+    def idle(self) -> bool:
+        """True when the bucket is full again — its state can be dropped without effect."""
+        return self._tat <= self._timer()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent loads of the same key into one in-flight call.
+
+    The first caller for a key starts the loader as a task; everybody arriving
+    while it runs awaits that same task. The key is forgotten as soon as the
+    task finishes, so a failed load is only seen by the callers already waiting
+    on it — the next caller starts a fresh attempt. Cancelling one waiter does
+    not cancel the shared load.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task[Any]] = {}
+        self.calls = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.loads += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "calls": self.calls,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "inflight": len(self._inflight),
+        }
@@ -3,8 +3,10 @@ from __future__ import annotations
 from loguru import logger
 
 import re
-from html import escape
-from typing import List, Final
+from bisect import bisect_left, bisect_right
+from html import escape, unescape
+from html.entities import html5 as _HTML5_ENTITIES
+from typing import Final, List, Tuple
 from html.parser import HTMLParser
 
 TG_TAGS = {"b", "i", "u", "s", "code", "pre", "a", "br"}
@@ -112,32 +114,341 @@ def remove_seo_hashtags(txt: str) -> str:
     return txt
 
 
+# ──────────────────────────────────────────
+# Splitting: Telegram counts a message in UTF-16 code units of the visible text (after entity
+# parsing — tags are free, "&amp;" is one unit, an emoji outside the BMP two)
+# ──────────────────────────────────────────
+_ANY_TAG_RE: Final[re.Pattern[str]] = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)[^>]*>")
+_ENTITY_RE: Final[re.Pattern[str]] = re.compile(
+    r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*);"
+)
+_ENTITY_SPLIT_RE: Final[re.Pattern[str]] = re.compile(f"({_ENTITY_RE.pattern})")
+_SENTENCE_END_RE: Final[re.Pattern[str]] = re.compile(r"[.!?…][)\]\"'»”]*\s")
+_VOID_TAGS = frozenset({"br", "hr", "img", "wbr"})
+
+# tag spans: (start, end, name, is_closing); void tags are recorded as closing with no name
+TagSpan = Tuple[int, int, str, bool]
+
+
+def _u16(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _decode_entity(m: re.Match[str]) -> str:
+    return unescape(m.group(0))
+
+
+def _visible_units(text: str) -> int:
+    """UTF-16 length of tag-free HTML text once its entities are decoded."""
+    return _u16(_ENTITY_RE.sub(_decode_entity, text) if "&" in text else text)
+
+
+def _fit(text: str, budget: int, at_least_one: bool) -> int:
+    """Longest prefix of tag-free `text` within `budget` units; entities are never cut."""
+    off = 0
+    for k, piece in enumerate(_ENTITY_SPLIT_RE.split(text)):
+        units = _u16(unescape(piece)) if k % 2 else _u16(piece)
+        if units <= budget:
+            budget -= units
+            off += len(piece)
+            at_least_one = at_least_one and not piece
+            continue
+        if k % 2:  # an entity that does not fit
+            return off + len(piece) if at_least_one else off
+        if units == len(piece):  # BMP only: chars are units
+            take = budget
+        else:
+            lo, hi = 0, min(budget, len(piece))
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                lo, hi = (mid, hi) if _u16(piece[:mid]) <= budget else (lo, mid - 1)
+            take = lo
+        return off + (take or int(at_least_one))
+    return off
+
+
+def _scan_tags(text: str) -> List[TagSpan]:
+    spans: List[TagSpan] = []
+    for m in _ANY_TAG_RE.finditer(text):
+        name = m.group(2).lower()
+        if name in _VOID_TAGS or m.group(0).endswith("/>"):
+            spans.append((m.start(), m.end(), "", True))
+        else:
+            spans.append((m.start(), m.end(), name, m.group(1) == "/"))
+    return spans
+
+
+def _in_tag(pos: int, spans: List[TagSpan], starts: List[int]) -> bool:
+    k = bisect_right(starts, pos) - 1
+    return k >= 0 and pos < spans[k][1]
+
+
+def _rfind_text(
+    text: str, sep: str, lo: int, hi: int, spans: List[TagSpan], starts: List[int]
+) -> int:
+    i = text.rfind(sep, lo, hi)
+    while i != -1 and _in_tag(i, spans, starts):
+        i = text.rfind(sep, lo, spans[bisect_right(starts, i) - 1][0])
+    return i
+
+
+def _soft_cut(text: str, lo: int, hi: int, spans: List[TagSpan], starts: List[int]) -> int:
+    """Best place to end a chunk in text[lo:hi]: paragraph → line → sentence → word → `hi`."""
+    for sep in ("\n\n", "\n"):
+        if (i := _rfind_text(text, sep, lo, hi, spans, starts)) != -1:
+            return i + len(sep)
+    sentences = [
+        m.end()
+        for m in _SENTENCE_END_RE.finditer(text, lo, hi)
+        if not _in_tag(m.start(), spans, starts)
+    ]
+    if sentences:
+        return sentences[-1]
+    if (i := _rfind_text(text, " ", lo, hi, spans, starts)) != -1:
+        return i + 1
+    return hi
+
+
+def _split(text: str, max_units: int, spans: List[TagSpan]) -> List[str]:
+    """
+    Chunks of at most `max_units` visible UTF-16 units, cut in whole slices: the hard limit is
+    found segment by segment (text between tags), then moved back to the last paragraph,
+    line, sentence or word break in the second half of the chunk. Tags still open at a cut
+    are closed at the end of the chunk and reopened at the start of the next one.
+    """
+    starts = [sp[0] for sp in spans]
+    chunks: List[str] = []
+    stack: List[Tuple[str, str]] = []  # (name, start tag as written) open at `start`
+    start, ti, n = 0, 0, len(text)
+    while start < n:
+        # 1. hard end: as far as the visible text fits
+        budget, pos, j, end = max_units, start, ti, n
+        while True:
+            seg_end = spans[j][0] if j < len(spans) else n
+            units = _visible_units(text[pos:seg_end])
+            if units > budget:
+                end = pos + _fit(text[pos:seg_end], budget, budget == max_units)
+                break
+            budget -= units
+            if j == len(spans):
+                break
+            pos = spans[j][1]
+            j += 1
+
+        # 2. nicer end, never inside a tag; closing tags stay with their text, opening ones move on
+        if end < n:
+            cut = _soft_cut(text, start + (end - start) // 2, end, spans, starts)
+            k = bisect_left(starts, cut)
+            while k < len(spans) and spans[k][0] == cut and spans[k][3]:
+                cut = spans[k][1]
+                k += 1
+            while k > 0 and spans[k - 1][1] == cut and not spans[k - 1][3]:
+                if spans[k - 1][0] <= start:
+                    break
+                k -= 1
+                cut = spans[k][0]
+            end = cut
+
+        # 3. emit: reopen what was open, close what is still open
+        reopen = "".join(tag for _name, tag in stack)
+        while ti < len(spans) and spans[ti][0] < end:
+            ts, te, name, closing = spans[ti]
+            if not closing:
+                stack.append((name, text[ts:te]))
+            elif stack and stack[-1][0] == name:
+                stack.pop()
+            ti += 1
+        closers = "".join(f"</{name}>" for name, _tag in reversed(stack))
+        chunks.append(reopen + text[start:end] + closers)
+        start = end
+    return chunks
+
+
 def split_html_safe(text: str, max_len: int = 4000) -> List[str]:
-    """Split only between tags, never inside <b>…>."""
-    parts, buff, depth = [], [], 0
-    for c in text:
-        if c == "<":
-            depth += 1
-        buff.append(c)
-        if c == ">":
-            depth = max(0, depth - 1)
-        if len(buff) >= max_len and depth == 0:
-            parts.append("".join(buff))
-            buff.clear()
-    if buff:
-        parts.append("".join(buff))
-
-    # balance each chunk: close orphan tags
-    balanced = []
-
-    for chunk in parts:
-        checker = TagChecker()
-        checker.feed(chunk)
-        if checker.stack:  # still-open tags → append closing partners
-            chunk += "".join(f"</{tag}>" for tag in reversed(checker.stack))
-        balanced.append(chunk)
-
-    return balanced
+    """
+    Split HTML into chunks of at most `max_len` UTF-16 units of visible text (how Telegram
+    measures a message), preferring paragraph and sentence breaks; never inside a tag or an
+    entity. Formatting open at a cut is closed and reopened in the next chunk.
+    """
+    return _split(text, max_len, _scan_tags(text))
+
+
+# ──────────────────────────────────────────
+# Single-pass pipeline: sanitise + split + close tags + drop hashtags
+# ──────────────────────────────────────────
+# `html_chunks` gives the same chunks as
+#     [remove_seo_hashtags(c).strip() for c in split_html_safe(safe_html(raw))]
+# with one walk over the body instead of bleach, an HTML parse and three regex passes per chunk.
+# It only accepts input for which bleach is the identity (the subset Google Docs export produces:
+# well-nested b/i/u/s/code/pre and <a href="http…">, escaped text) and raises `UnsupportedHtml`
+# for anything else — callers then take the legacy chain.
+
+class UnsupportedHtml(ValueError):
+    """Input the single-pass pipeline cannot reproduce exactly; use the legacy chain."""
+
+
+_PLAIN_TAGS = frozenset(_INLINE_TAGS)
+_STRICT_TAG_RE: Final[re.Pattern[str]] = re.compile(r'<(/?)([a-z]+)((?: href="[^"<>]*")?)>')
+_SAFE_SCHEMES = ("http://", "https://", "mailto:")
+# in text bleach keeps only known entities; it escapes/rewrites ">", "\r" and control chars
+_TEXT_SPECIAL_RE: Final[re.Pattern[str]] = re.compile(
+    r"[>\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufdd0-\ufdef\ufffe\uffff]"
+    r"|&(?!#[0-9]+;|#[xX][0-9a-fA-F]+;|[A-Za-z][A-Za-z0-9]*;)"
+)
+_NAMED_ENTITY_RE: Final[re.Pattern[str]] = re.compile(r"&([A-Za-z][A-Za-z0-9]*;)")
+_WRAPPER_TAG_RE: Final[re.Pattern[str]] = re.compile(
+    r"<(?:{tags})[^>]*>".format(tags="|".join(_INLINE_TAGS)), re.IGNORECASE
+)
+
+
+def _check_text(text: str) -> None:
+    if (m := _TEXT_SPECIAL_RE.search(text)) is not None:
+        raise UnsupportedHtml(f"needs sanitising: {m.group(0)!r}")
+    if "&" in text and not _HTML5_ENTITIES.keys() >= set(_NAMED_ENTITY_RE.findall(text)):
+        raise UnsupportedHtml("unknown entity")
+
+
+def _tag_spans(body: str) -> List[TagSpan]:
+    """
+    Validate `body` and return its tags as (start, end, name, is_closing), in order.
+    The body is walked once: text between tags is checked, tags are matched against a stack.
+    """
+    spans: List[TagSpan] = []
+    stack: List[str] = []
+    pos = 0
+    while (lt := body.find("<", pos)) != -1:
+        _check_text(body[pos:lt])
+        m = _STRICT_TAG_RE.match(body, lt)
+        if m is None:
+            raise UnsupportedHtml("malformed or attributed tag")
+        closing, name, href = m.group(1) == "/", m.group(2), m.group(3)
+        if closing:
+            if href or not stack or stack[-1] != name:
+                raise UnsupportedHtml(f"misnested </{name}>")
+            stack.pop()
+        elif name == "a":
+            if "a" in stack:
+                raise UnsupportedHtml("nested <a>")
+            value = href[7:-1]  # ' href="…"'
+            if not value.lower().startswith(_SAFE_SCHEMES):
+                raise UnsupportedHtml(f"href needs sanitising: {value!r}")
+            _check_text(value)
+            stack.append(name)
+        elif name in _PLAIN_TAGS and not href:
+            if name == "pre" and body.startswith("\n", m.end()):
+                raise UnsupportedHtml("newline after <pre> is dropped by the parser")
+            stack.append(name)
+        else:
+            raise UnsupportedHtml(f"tag not kept as is: <{name}>")
+        spans.append((lt, m.end(), name, closing))
+        pos = m.end()
+    _check_text(body[pos:])
+    if stack:
+        raise UnsupportedHtml(f"unclosed <{stack[-1]}>")
+    return spans
+
+
+def _skip_space_back(txt: str, i: int) -> int:
+    while i >= 0 and txt[i].isspace():
+        i -= 1
+    return i
+
+
+def _skip_space(txt: str, i: int) -> int:
+    while i < len(txt) and txt[i].isspace():
+        i += 1
+    return i
+
+
+def _skip_tags(txt: str, i: int, space_first: bool) -> int:
+    """End of the run of tags at `i` (whitespace allowed between them) — `(?:<[^>]*>\\s*)*`."""
+    n = len(txt)
+    while True:
+        j = _skip_space(txt, i) if space_first else i
+        if j >= n or txt[j] != "<" or (gt := txt.find(">", j)) < 0:
+            return i
+        i = gt + 1 if space_first else _skip_space(txt, gt + 1)
+
+
+def _glued(txt: str, i: int) -> bool:
+    # the `(?<![=&\w])` guard of _HASHTAG_RE
+    return i > 0 and (txt[i - 1] in "=&_" or txt[i - 1].isalnum())
+
+
+def _preserve_nl(match: re.Match[str]) -> str:
+    return "\n" if "\n" in match.group(0) else " "
+
+
+_SPACES_RE: Final[re.Pattern[str]] = re.compile(r"[ \t]+")
+
+
+def _drop_hashtags(txt: str) -> Tuple[str, bool]:
+    """
+    `remove_seo_hashtags` without the regex backtracking, for text whose "<" only ever opens a
+    whole tag; also reports whether tags were eaten along with a hashtag (as the regex does).
+    """
+    if "#" not in txt:
+        return txt, False
+    out: List[str] = []
+    pos, n, ate_tags = 0, len(txt), False
+    i = txt.find("#")
+    while i != -1:
+        if txt.rfind("<", 0, i) > txt.rfind(">", 0, i):
+            raise UnsupportedHtml("'#' inside a tag")  # the regex would cut the tag apart
+        body = _skip_tags(txt, i + 1, space_first=False)
+        end = body
+        while end < n and not (txt[end].isspace() or txt[end] in "#<"):
+            end += 1
+        if end == body:  # no hashtag body → no match at this "#"
+            i = txt.find("#", i + 1)
+            continue
+        # leftmost start: the first inline wrapper of the chain right before "#", else "#" itself
+        start = None if _glued(txt, i) else i
+        j = _skip_space_back(txt, i - 1)
+        while j >= pos and txt[j] == ">":
+            lt = txt.rfind("<", pos, j)
+            if lt < 0 or not _WRAPPER_TAG_RE.fullmatch(txt, lt, j + 1):
+                break
+            if not _glued(txt, lt):
+                start = lt
+            j = _skip_space_back(txt, lt - 1)
+        if start is None:
+            i = txt.find("#", i + 1)
+            continue
+        end = _skip_tags(txt, end, space_first=True)
+        ate_tags = ate_tags or "<" in txt[start:end]
+        out.append(txt[pos:start])
+        out.append(" ")
+        pos = end
+        i = txt.find("#", end)
+    out.append(txt[pos:])
+    txt = _EMPTY_INLINE_TAG_RE.sub(_preserve_nl, "".join(out))
+    return "\n".join(_SPACES_RE.sub(" ", line).strip() for line in txt.splitlines()), ate_tags
+
+
+def drop_hashtags(txt: str) -> str:
+    """
+    Same result as `remove_seo_hashtags`, walking only the "#" positions. Raises
+    `UnsupportedHtml` for a "#" inside a tag (e.g. a link fragment).
+    """
+    return _drop_hashtags(txt)[0]
+
+
+def html_chunks(raw: str, max_len: int = 4000) -> Tuple[List[str], bool]:
+    """
+    Telegram-safe, hashtag-free, balanced chunks of `raw` — the same chunks as
+    `remove_seo_hashtags(c).strip()` over `split_html_safe(safe_html(raw), max_len)` — plus
+    whether the first one is still balanced (False once a hashtag took a tag with it).
+    The validating walk doubles as the splitter's tag scan, so bleach and the HTML parser
+    never run. Raises `UnsupportedHtml` for input outside the strict subset described above.
+    """
+    chunks: List[str] = []
+    first_balanced = True
+    for k, chunk in enumerate(_split(raw, max_len, _tag_spans(raw))):
+        chunk, ate_tags = _drop_hashtags(chunk)
+        chunks.append(chunk.strip())
+        first_balanced = first_balanced and not (ate_tags and k == 0)
+    return chunks, first_balanced
 
 
 if __name__ == "__main__":
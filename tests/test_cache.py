@@ -0,0 +1,116 @@
+from src.tools.cache import MISSING, TTLCache, cache_stats
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, maxsize=100, timer=clock)
+    cache.set("a", 1)
+    clock.now = 9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_set_purges_expired_without_touching_fresh_entries():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, maxsize=100, timer=clock)
+    cache.set("old", 1)
+    clock.now = 5
+    cache.set("new", 2)
+    clock.now = 11
+    cache.set("newest", 3)
+    assert "old" not in cache._store
+    assert cache.get("new") == 2
+
+
+def test_overwrite_is_not_expired_by_stale_queue_item():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, maxsize=100, timer=clock)
+    cache.set("a", 1)
+    clock.now = 8
+    cache.set("a", 2)
+    clock.now = 12
+    cache.set("b", 3)  # pops the stale (10, "a") queue item
+    assert cache.get("a") == 2
+
+
+def test_lru_eviction_by_count():
+    cache = TTLCache(ttl_seconds=None, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_eviction_by_estimated_bytes():
+    cache = TTLCache(ttl_seconds=None, maxsize=100, max_bytes=250, sizeof=lambda v: 100)
+    cache.set("a", "x")
+    cache.set("b", "y")
+    cache.set("c", "z")
+    assert len(cache) == 2
+    assert cache.bytes == 200
+    assert cache.get("a") is None
+
+
+def test_none_is_negative_cached_with_its_own_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=100, maxsize=10, negative_ttl_seconds=5, timer=clock)
+    cache.set("gone", None)
+    assert cache.get("gone", MISSING) is None
+    clock.now = 5
+    assert cache.get("gone", MISSING) is MISSING
+
+
+def test_advance_generation_drops_entries_and_rejects_stale_loads():
+    cache = TTLCache(ttl_seconds=None, maxsize=10)
+    cache.set("a", 1, generation=0)
+    assert cache.advance_generation(1)
+    assert cache.get("a") is None
+    cache.set("a", "loaded before sync", generation=0)
+    assert cache.get("a") is None
+    cache.set("a", "fresh", generation=1)
+    assert cache.get("a") == "fresh"
+    assert not cache.advance_generation(1)
+
+
+def test_counters_track_hits_misses_expirations_and_evictions():
+    clock = FakeClock()
+    cache = TTLCache(name="test_counters", ttl_seconds=10, maxsize=1, timer=clock)
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.set("b", 2)  # evicts "a"
+    clock.now = 10
+    cache.get("b")  # expired
+    cache.record_load(0.25)
+
+    stats = cache_stats()["test_counters"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert (stats["expirations"], stats["evictions"]) == (1, 1)
+    assert stats["load_ms_avg"] == 250.0
+    assert stats["size"] == 0
+
+
+def test_soft_ttl_marks_entries_stale_until_hard_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=100, soft_ttl_seconds=10, maxsize=10, timer=clock)
+    cache.set("a", 1)
+    assert cache.lookup("a") == (1, False)
+    clock.now = 10
+    assert cache.lookup("a") == (1, True)
+    cache.set("a", 2)  # background refresh landed
+    assert cache.lookup("a") == (2, False)
+    clock.now = 110
+    assert cache.lookup("a") == (MISSING, False)
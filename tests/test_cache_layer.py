@@ -0,0 +1,65 @@
+import pytest
+
+from src.bot import cache_layer
+from src.content.models import Content, ContentSummary, NodeView
+
+
+def fake(id_: int, parent_id: int | None = None) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=str(id_), body="x", ord=0, text_digest="",
+                   embedded_at=None)
+
+
+@pytest.fixture()
+def db_calls(monkeypatch):
+    calls = []
+
+    async def get_contents_many(item_ids):
+        calls.append(list(item_ids))
+        return [fake(i) for i in item_ids if i > 0], [i for i in item_ids if i <= 0]
+
+    async def get_node_view(item_id, *, page=0, page_size=None):
+        calls.append(("view", item_id))
+        if item_id <= 0:
+            return None
+        return NodeView(
+            fake(item_id),
+            [ContentSummary(item_id * 10, "child", 0, False)],
+            [fake(1), fake(item_id)],
+        )
+
+    monkeypatch.setattr(cache_layer, "get_contents_many", get_contents_many)
+    monkeypatch.setattr(cache_layer, "get_node_view", get_node_view)
+    monkeypatch.setattr(cache_layer, "current_tree", lambda: None)
+    for cache in cache_layer._ALL_CACHES:
+        cache.clear()
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_get_contents_many_cached_fills_per_id_cache(db_calls):
+    found, missing = await cache_layer.get_contents_many_cached([3, -1, 2])
+
+    assert [c.id for c in found] == [3, 2]
+    assert missing == [-1]
+    assert db_calls == [[3, -1, 2]]
+
+    # single lookups and the missing id are now answered without the DB
+    assert (await cache_layer.get_content_cached(3)).id == 3
+    assert await cache_layer.get_content_cached(-1) is None
+    found, missing = await cache_layer.get_contents_many_cached([2, 4, -1])
+    assert [c.id for c in found] == [2, 4]
+    assert missing == [-1]
+    assert db_calls == [[3, -1, 2], [4]]
+
+
+@pytest.mark.asyncio
+async def test_node_view_is_loaded_once_and_fills_individual_caches(db_calls):
+    view = await cache_layer.get_node_view_cached(5)
+
+    assert [c.id for c in view.children] == [50]
+    assert [c.id for c in await cache_layer.get_breadcrumb_cached(5)] == [1, 5]
+    assert [c.id for c in await cache_layer.get_children_cached(5)] == [50]
+    assert (await cache_layer.get_node_view_cached(5)).item.id == 5
+    assert await cache_layer.get_node_view_cached(-1) is None
+    assert await cache_layer.get_content_cached(-1) is None
+    assert db_calls == [("view", 5), ("view", -1)]
@@ -0,0 +1,37 @@
+import pytest
+
+from src.bot.callbacks import (
+    HOME_DATA, Action, Callback, back_data, decode, encode, home_data, open_data, save_data,
+)
+
+
+def test_round_trip_is_compact():
+    assert open_data(1234) == "1o.ya"
+    assert save_data(1234, 77) == "1s.ya.25"
+    assert HOME_DATA == "1h" == home_data(0)
+    assert open_data(1234, page=2) == "1o.ya.2"
+    for cb in (
+        Callback(Action.OPEN, 0),
+        Callback(Action.BACK, 10**12),
+        Callback(Action.HOME),
+        Callback(Action.SAVE, 5, 2**31),
+        Callback(Action.OPEN, 7, page=3),
+        Callback(Action.HOME, page=1),
+    ):
+        assert decode(encode(cb)) == cb
+    assert len(save_data(2**63 - 1, 2**31)) <= 64  # Telegram's callback_data limit
+
+
+def test_legacy_callbacks_still_decode():
+    assert decode("open_42") == Callback(Action.OPEN, 42)
+    assert decode("back_7") == Callback(Action.BACK, 7)
+    assert decode("back_root") == Callback(Action.HOME)
+    assert decode("save_42_1001") == Callback(Action.SAVE, 42, 1001)
+    assert decode(back_data(7)) == decode("back_7")
+
+
+@pytest.mark.parametrize(
+    "data", [None, "", "1", "1x.1", "1o", "1o.1.2.3", "1b.1.2", "1o.!", "open_", "save_1", "foo_1"]
+)
+def test_garbage_decodes_to_none(data):
+    assert decode(data) is None
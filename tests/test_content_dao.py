@@ -1,6 +1,17 @@
 import pytest
 
-from src.bot.content_dao import get_children
+from src.bot.content_dao import (
+    get_breadcrumb,
+    get_breadcrumbs_many,
+    get_children,
+    get_children_page,
+    get_children_summaries,
+    get_contents_many,
+    get_node_view,
+    get_subtree_leaves,
+    search_fts,
+)
+from src.content.sync.storage.repository import delete_subtree, upsert_node
 from src.tools.db import execute, fetch
 
 
@@ -41,3 +52,189 @@ async def test_get_children_happy_path():
                 "DELETE FROM content WHERE id = ANY($1::bigint[]);",
                 inserted_ids,
             )
+
+
+async def _seed_chain() -> list[int]:
+    """Root → Child → Leaf; returns their ids in that order."""
+    ids: list[int] = []
+    parent = None
+    for title in ("BC Root", "BC Child", "BC Leaf"):
+        row = await fetch(
+            "INSERT INTO content (parent_id, title) VALUES ($1, $2) RETURNING id;",
+            parent,
+            title,
+        )
+        parent = row[0]["id"]
+        ids.append(parent)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_get_breadcrumb_returns_chain_from_root():
+    inserted_ids: list[int] = []
+    try:
+        inserted_ids = await _seed_chain()
+
+        chain = await get_breadcrumb(inserted_ids[-1])
+
+        assert [c.id for c in chain] == inserted_ids
+        assert await get_breadcrumb(-1) == []
+    finally:
+        if inserted_ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", inserted_ids)
+
+
+@pytest.mark.asyncio
+async def test_get_breadcrumbs_many_resolves_all_ids_in_one_call():
+    inserted_ids: list[int] = []
+    try:
+        inserted_ids = await _seed_chain()
+        root, child, leaf = inserted_ids
+
+        chains = await get_breadcrumbs_many([leaf, child, -1])
+
+        assert [c.id for c in chains[leaf]] == [root, child, leaf]
+        assert [c.id for c in chains[child]] == [root, child]
+        assert chains[-1] == []
+    finally:
+        if inserted_ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", inserted_ids)
+
+
+@pytest.mark.asyncio
+async def test_get_contents_many_keeps_requested_order_and_reports_missing():
+    inserted_ids: list[int] = []
+    try:
+        inserted_ids = await _seed_chain()
+        root, child, leaf = inserted_ids
+
+        found, missing = await get_contents_many([leaf, -1, root, child])
+
+        assert [c.id for c in found] == [leaf, root, child]
+        assert missing == [-1]
+        assert await get_contents_many([]) == ([], [])
+    finally:
+        if inserted_ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", inserted_ids)
+
+
+@pytest.mark.asyncio
+async def test_get_node_view_returns_item_children_and_breadcrumb():
+    inserted_ids: list[int] = []
+    try:
+        inserted_ids = await _seed_chain()
+        root, child, leaf = inserted_ids
+        rows = await fetch(
+            "INSERT INTO content (parent_id, title, ord) VALUES ($1, 'BC First', 0) RETURNING id;",
+            child,
+        )
+        inserted_ids.append(rows[0]["id"])
+        await execute("UPDATE content SET ord = 1 WHERE id = $1;", leaf)
+
+        view = await get_node_view(child)
+
+        assert view.item.id == child
+        assert [c.id for c in view.breadcrumb] == [root, child]
+        assert [c.title for c in view.children] == ["BC First", "BC Leaf"]
+        assert [c.has_children for c in (await get_node_view(root)).children] == [True]
+        assert (await get_node_view(leaf)).children == []
+        assert await get_node_view(-1) is None
+    finally:
+        if inserted_ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", inserted_ids)
+
+
+async def _seed_tree_with_paths() -> list[int]:
+    """Root → (A → (A1, A2), B) written like sync does it; returns [root, A, A1, A2, B]."""
+    root = (await fetch(
+        "INSERT INTO content (title) VALUES ('PT Root') RETURNING id;"
+    ))[0]["id"]
+    await execute("UPDATE content SET path = ARRAY[id] WHERE id = $1;", root)
+
+    async def node(parent: int, parent_path: tuple[int, ...], ord_: int, title: str) -> int:
+        cid, *_ = await upsert_node(
+            parent_id=parent, ord_=ord_, title=title, body=None, force_reembed_all=False,
+            parent_path=parent_path,
+        )
+        return cid
+
+    a = await node(root, (root,), 0, "PT A")
+    a1 = await node(a, (root, a), 0, "PT A1")
+    a2 = await node(a, (root, a), 1, "PT A2")
+    b = await node(root, (root,), 1, "PT B")
+    return [root, a, a1, a2, b]
+
+
+@pytest.mark.asyncio
+async def test_materialised_path_drives_breadcrumbs_and_subtrees():
+    ids: list[int] = []
+    try:
+        ids = await _seed_tree_with_paths()
+        root, a, a1, a2, b = ids
+        paths = await fetch(
+            "SELECT id, path, depth FROM content WHERE id = ANY($1::bigint[]);", ids
+        )
+        assert {r["id"]: (list(r["path"]), r["depth"]) for r in paths}[a2] == ([root, a, a2], 2)
+
+        assert [c.id for c in await get_breadcrumb(a2)] == [root, a, a2]
+        assert [c.id for c in (await get_breadcrumbs_many([a1]))[a1]] == [root, a, a1]
+        assert [c.id for c in (await get_node_view(a)).breadcrumb] == [root, a]
+        assert {c.id for c in await get_subtree_leaves(root)} == {a1, a2, b}
+        assert [c.id for c in await get_subtree_leaves(a1)] == [a1]
+
+        summaries = await get_children_summaries(root)
+        assert [(c.id, c.has_children) for c in summaries] == [(a, True), (b, False)]
+
+        assert set(await delete_subtree(a)) == {a, a1, a2}
+        assert [c.id for c in await get_children(root)] == [b]
+    finally:
+        if ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", ids)
+
+
+@pytest.mark.asyncio
+async def test_children_are_fetched_one_page_at_a_time():
+    ids: list[int] = []
+    try:
+        ids = await _seed_tree_with_paths()
+        root, a, a1, a2, b = ids
+
+        first = await get_children_page(root, 0, 1)
+        assert ([c.id for c in first.items], first.page, first.pages) == ([a], 0, 2)
+        second = await get_children_page(root, 1, 1)
+        assert ([(c.id, c.has_children) for c in second.items], second.page) == ([(b, False)], 1)
+        last = await get_children_page(root, 5, 1)  # past the end → last page
+        assert (last.page, last.pages) == (second.page, second.pages)
+        assert last.items == second.items
+
+        view = await get_node_view(root, page=1, page_size=1)
+        assert ([c.id for c in view.children], view.page, view.pages) == ([b], 1, 2)
+        assert [c.id for c in view.breadcrumb] == [root]
+        clamped = await get_node_view(root, page=9, page_size=1)
+        assert ([c.id for c in clamped.children], clamped.page) == ([b], 1)
+        assert (await get_node_view(a1, page=3, page_size=1)).children == []
+    finally:
+        if ids:
+            await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", ids)
+
+
+@pytest.mark.asyncio
+async def test_full_text_search_matches_any_stemmed_term():
+    rows = await fetch(
+        """
+        INSERT INTO content (title, body)
+        VALUES ('FTS Шенгенская виза', '<p>Документы для <b>консульства</b></p>'),
+               ('FTS Транспорт', 'Поезда Renfe, автобусы и визовые центры')
+        RETURNING id;
+        """
+    )
+    visa, transport = (r["id"] for r in rows)
+    try:
+        ranked = [i for i, _ in await search_fts("как получить визу в консульстве", 10)]
+        assert ranked[0] == visa  # title (weight A) + body match
+
+        assert [i for i, _ in await search_fts("renfe", 10)] == [transport]
+        assert await search_fts("и в на", 10) == []  # stop words only
+        assert await search_fts("", 10) == []
+    finally:
+        await execute("DELETE FROM content WHERE id = ANY($1::bigint[]);", [visa, transport])
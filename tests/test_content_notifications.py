@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from src.content import generation
+from src.content.sync.notifications import build_payload, handle_notification
+
+
+@pytest.fixture()
+def received(monkeypatch):
+    changes = []
+    monkeypatch.setattr(generation, "_current", 5)
+    monkeypatch.setattr(generation, "_listeners", [changes.append])
+    return changes
+
+
+def test_payload_falls_back_to_full_flush_when_too_large():
+    small = json.loads(build_payload(3, "rev", [2, 1], [None, 7]))
+    assert small["ids"] == [1, 2]
+    assert small["parents"] == [None, 7]
+
+    big = json.loads(build_payload(3, "rev", range(10_000), []))
+    assert big["ids"] is None
+
+
+def test_next_generation_carries_changed_ids(received):
+    handle_notification(build_payload(6, "rev", [10, 11], [1]))
+
+    assert received[0].generation == 6
+    assert received[0].changed_ids == {10, 11}
+    assert received[0].parent_ids == {1}
+
+
+def test_generation_gap_turns_into_full_flush(received):
+    handle_notification(build_payload(8, "rev", [10], [1]))
+
+    assert received[0].generation == 8
+    assert received[0].changed_ids is None
+
+
+def test_stale_and_malformed_notifications_are_ignored(received):
+    handle_notification(build_payload(5, "rev", [10], []))
+    handle_notification("not json")
+
+    assert received == []
@@ -0,0 +1,70 @@
+import pytest
+
+from src.bot.content_tree import ContentTree
+from src.bot.keyboard import with_save_button
+from src.content.models import Content
+
+
+def fake(id_: int, parent_id: int | None, title: str, ord_: int = 0) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=title, body=None, ord=ord_, text_digest="",
+                   embedded_at=None)
+
+
+def test_build_indexes_children_and_breadcrumbs():
+    rows = [
+        fake(1, None, "Spain"),
+        fake(3, 1, "Food", ord_=1),
+        fake(2, 1, "<b>Visa</b> &amp; docs", ord_=0),
+        fake(4, 2, "Schengen"),
+    ]
+    tree = ContentTree.build(rows, generation=7)
+
+    assert tree.generation == 7
+    assert [c.id for c in tree.children[None]] == [1]
+    assert [(c.id, c.has_children) for c in tree.children[1]] == [(2, True), (3, False)]
+    assert 4 not in tree.children
+    assert [c.id for c in tree.breadcrumbs[4]] == [1, 2, 4]
+    assert [c.id for c in tree.breadcrumbs[1]] == [1]
+    assert tree.clean_titles[2] == "Visa & docs"
+
+
+def test_dangling_parent_stops_the_chain_and_snapshot_is_read_only():
+    tree = ContentTree.build([fake(5, 99, "Orphan")], generation=1)
+
+    assert [c.id for c in tree.breadcrumbs[5]] == [5]
+    with pytest.raises(TypeError):
+        tree.nodes[6] = fake(6, None, "x")  # type: ignore[index]
+
+
+def test_keyboards_are_built_once_per_node_and_shared_by_leaves():
+    rows = [fake(1, None, "Spain"), fake(2, 1, "Visa"), fake(3, 1, "Food")]
+    tree = ContentTree.build(rows, generation=1)
+
+    def callbacks(kb):
+        return [b.callback_data for row in kb.inline_keyboard for b in row]
+
+    assert callbacks(tree.keyboards[("menu", None, 0)]) == ["1o.1"]
+    assert callbacks(tree.keyboards[("category", 1, 0)]) == ["1o.2", "1o.3", "1h", "1h"]
+    assert tree.keyboards[("leaf", 2, 0)] is tree.keyboards[("leaf", 3, 0)]
+
+    saved = with_save_button(tree.keyboards[("leaf", 2, 0)], 2, 99)
+    assert callbacks(saved)[-1] == "1s.2.2r"
+    assert "1s.2.2r" not in callbacks(tree.keyboards[("leaf", 2, 0)])
+
+
+def test_big_categories_get_one_keyboard_per_page():
+    rows = [fake(1, None, "Spain")] + [fake(10 + i, 1, f"City {i}", ord_=i) for i in range(5)]
+    tree = ContentTree.build(rows, generation=1, page_size=2)
+
+    def texts(kb):
+        return [b.text for row in kb.inline_keyboard for b in row]
+
+    assert texts(tree.keyboards[("category", 1, 0)])[:4] == ["City 0", "City 1", "1/3", "▶️"]
+    assert texts(tree.keyboards[("category", 1, 2)])[:3] == ["City 4", "◀️", "3/3"]
+    assert ("category", 1, 3) not in tree.keyboards
+    nav = tree.keyboards[("category", 1, 1)].inline_keyboard[2]
+    assert [b.callback_data for b in nav] == ["1o.1", "1o.1.1", "1o.1.2"]
+    assert ("menu", None, 0) in tree.keyboards and ("menu", None, 1) not in tree.keyboards
+
+    page = tree.children_page(1, 7)
+    assert ([c.id for c in page.items], page.page, page.pages) == ([14], 2, 3)
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from src.content.models import Content
+from src.content.renderer import (
+    _legacy_body_chunks,
+    _render_legacy,
+    body_chunks,
+    render_leaf_message,
+)
+from src.tools.utils.utils_html import UnsupportedHtml, html_chunks, split_html_safe
+
+
+def fake(id_: int, parent_id: int | None, title: str, body: str | None = None) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=title, body=body, ord=0, text_digest="",
+                   embedded_at=None)
+
+
+def docs_article(seed: int, paragraphs: int) -> str:
+    """Body shaped like the Google Docs sync output: escaped runs in b/i/u/s/a wrappers."""
+    rnd = random.Random(seed)
+    words = ["виза", "Испания", "NIE", "&quot;Padrón&quot;", "5&nbsp;€", "🇪🇸", "Tom &amp; Jerry",
+             "#виза", "#spain", "(#tips)", "a#b", "&#39;x&#39;", "город", "—"]
+    lines = []
+    for _ in range(paragraphs):
+        runs = []
+        for _ in range(rnd.randint(1, 6)):
+            txt = " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 25)))
+            for tag in ("b", "i", "u", "s"):
+                if rnd.random() < 0.2:
+                    txt = f"<{tag}>{txt}</{tag}>"
+            if rnd.random() < 0.1:
+                txt = f'<a href="https://example.com/?q=1&amp;p={rnd.randint(1, 9)}">{txt}</a>'
+            runs.append(txt + rnd.choice(["", " ", "\n"]))
+        lines.append("".join(runs).rstrip())
+    return "\n".join(lines)
+
+
+GOLDEN = [
+    "Plain text",
+    "<b>Bold</b> and <i>italic <u>underlined</u></i>",
+    "#visa #виза text #tag\n\n  second   line #end",
+    "<b>#tag</b> wrapped",                        # legacy regex eats the wrappers
+    "x <i>y #tag</i> z <u><b>#a</b></u>\n<s>#b c</s>",
+    "x <i>#документы </i> Всё ок",
+    "Tom & Jerry > cats",                        # bleach escapes
+    "<p>para</p><br>line<script>x</script>",     # stripped / <br> → plain text
+    "<b>unclosed <i>overlap</b></i>",
+    '<a href="tg://resolve">tg</a> <a href="https://t.me/x">ok</a>',
+    '<a href="https://x.y/#top">up</a> #up',
+    "<B>upper</B> &foo; &nbsp;x",
+    "<pre>\ncode</pre>",
+    "emoji 😀🇪🇸 and &#128512; &Auml;",
+    "",
+    docs_article(1, 40),
+    docs_article(2, 400),                        # long article: many chunks
+]
+
+
+@pytest.mark.parametrize("max_len", [40, 500, 3800])
+@pytest.mark.parametrize("body", GOLDEN)
+def test_single_pass_matches_legacy_output(body, max_len):
+    crumbs = [fake(1, None, "Spain #es"), fake(2, 1, "Visa & NIE")]
+    item = fake(2, 1, "Visa & NIE", body)
+
+    assert render_leaf_message(item, crumbs, max_len=max_len) == _render_legacy(
+        "Spain #es › Visa &amp; NIE", body or "…", max_len
+    )
+    assert body_chunks(body, max_len) == _legacy_body_chunks(body, max_len)
+
+
+def test_docs_bodies_take_the_single_pass_path():
+    chunks, _first_balanced = html_chunks(docs_article(2, 400), 3800)
+    assert len(chunks) > 5
+
+    # a hashtag glued to tags takes them along, exactly like the legacy regex
+    assert html_chunks("<b>#tag</b> wrapped, <i>more</i>") == (["wrapped, <i>more</i>"], False)
+    assert html_chunks("<b>bold #tag</b> tail") == (["<b>bold tail"], False)
+
+    for legacy_only in ("a <br> b", "Tom & Jerry", '<a href="https://x.y/#top">#up</a>', "<b>open"):
+        with pytest.raises(UnsupportedHtml):
+            html_chunks(legacy_only)
+
+
+def test_split_counts_visible_utf16_units():
+    # tags are free, an entity is one unit, an emoji outside the BMP is two
+    assert split_html_safe("<b>ab</b>&amp;c", 4) == ["<b>ab</b>&amp;c"]
+    assert split_html_safe("😀😀😀", 4) == ["😀😀", "😀"]
+    assert split_html_safe("ab&amp;cd", 3) == ["ab&amp;", "cd"]  # entities are never cut
+
+
+def test_split_prefers_paragraphs_and_sentences():
+    text = "First paragraph.\n\nSecond one. It goes on and on"
+    assert split_html_safe(text, 30) == ["First paragraph.\n\n", "Second one. It goes on and on"]
+    assert split_html_safe("One. Two three four", 14) == ["One. Two ", "three four"]
+
+
+def test_split_reopens_active_tags():
+    assert split_html_safe("<b>one two <i>three four</i></b> five", 14) == [
+        "<b>one two <i>three </i></b>",
+        "<b><i>four</i></b> five",
+    ]
+    # never inside a tag, even where an attribute has spaces
+    chunks = split_html_safe('<a href="https://x.y/a b">one two</a> three', 9)
+    assert chunks == ['<a href="https://x.y/a b">one two</a> ', "three"]
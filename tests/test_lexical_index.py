@@ -0,0 +1,62 @@
+import pytest
+
+import src.bot.lexical_index as lexical
+from src.bot.content_tree import ContentTree
+from src.bot.lexical_index import LexicalIndex, tokenize
+from src.content.models import Content
+
+
+def fake(
+    id_: int, parent_id: int | None, title: str, body: str | None, digest: str = ""
+) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=title, body=body, ord=0,
+                   text_digest=digest or body or title, embedded_at=None)
+
+
+ROWS = [
+    fake(1, None, "Испания", None),
+    fake(2, 1, "Виза", "<b>Шенгенская виза</b> оформляется в консульстве за 15 дней."),
+    fake(3, 1, "Транспорт", "Поезда Renfe и автобусы Alsa — самый удобный транспорт."),
+    fake(4, 1, "Еда", "Тапас и паэлья. Визу здесь не спрашивают."),
+]
+
+
+def test_tokenize_strips_html_stop_words_and_inflection():
+    assert tokenize("<b>Визы</b> и &laquo;визу&raquo;") == tokenize("виза виза")
+    assert tokenize("The trains") == tokenize("train")
+
+
+def test_bm25_ranks_title_and_body_matches():
+    index = LexicalIndex()
+    assert index.update(ContentTree.build(ROWS, generation=1)) == 4
+
+    assert [i for i, _ in index.search("визы")] == [2, 4]  # title hit beats a body mention
+    assert [i for i, _ in index.search("автобусы renfe")] == [3]
+    assert index.search("и в на") == []
+    assert len(index.search("виза транспорт", top_k=1)) == 1
+
+
+def test_update_reindexes_only_changed_and_drops_deleted_nodes():
+    index = LexicalIndex()
+    index.update(ContentTree.build(ROWS, generation=1))
+
+    rows = [r for r in ROWS if r.id != 3]
+    rows[-1] = fake(4, 1, "Еда", "Тапас, паэлья и автобусы-рестораны.")
+    assert index.update(ContentTree.build(rows, generation=2)) == 1
+    assert len(index) == 3
+    assert [i for i, _ in index.search("автобусы")] == [4]
+    assert [i for i, _ in index.search("визу")] == [2]
+
+
+@pytest.mark.asyncio
+async def test_refresh_swaps_in_a_new_index_built_off_the_loop(monkeypatch):
+    monkeypatch.setattr(lexical, "_index", None)
+    await lexical.refresh_lexical_index(ContentTree.build(ROWS, generation=1))
+    first = lexical._index
+
+    await lexical.refresh_lexical_index(ContentTree.build(ROWS[:2], generation=2))
+    assert lexical._index is not first and len(lexical._index) == 2
+    assert first.generation == 1 and len(first) == 4  # the index searches were using is untouched
+
+    await lexical.refresh_lexical_index(ContentTree.build(ROWS, generation=1))  # late, older build
+    assert lexical._index.generation == 2
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+
+from src.bot import message_edit
+from src.bot.keyboard import build_children_kb
+from src.content.models import ContentSummary
+
+
+class FakeMessage:
+    """Stands in for an aiogram Message: records edits, shows what Telegram would show."""
+
+    def __init__(self, text: str | None = None, reply_markup=None, not_modified: bool = False):
+        self.chat = SimpleNamespace(id=1)
+        self.message_id = 10
+        self.text = self.html_text = text
+        self.reply_markup = reply_markup
+        self.calls: list[str] = []
+        self._not_modified = not_modified
+
+    async def edit_text(self, text, reply_markup=None, **kwargs):
+        if self._not_modified:
+            raise TelegramBadRequest(
+                EditMessageText(text=text), "Bad Request: message is not modified"
+            )
+        self.calls.append("edit_text")
+        self.text = self.html_text = text
+        self.reply_markup = reply_markup
+
+    async def edit_reply_markup(self, reply_markup=None):
+        self.calls.append("edit_reply_markup")
+        self.reply_markup = reply_markup
+
+
+def kb(*ids: int):
+    return build_children_kb([ContentSummary(i, str(i), 0, False) for i in ids], parent_id=None)
+
+
+@pytest.fixture(autouse=True)
+def _empty_state():
+    message_edit._state.clear()
+
+
+@pytest.mark.asyncio
+async def test_identical_edit_is_skipped_and_keyboard_only_change_edits_markup():
+    msg = FakeMessage()
+
+    assert await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(1)) == "text"
+    assert await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(1)) == "skipped"
+    assert await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(2)) == "markup"
+    assert await message_edit.edit_text_if_changed(msg, "other", reply_markup=kb(2)) == "text"
+
+    assert msg.calls == ["edit_text", "edit_reply_markup", "edit_text"]
+
+
+@pytest.mark.asyncio
+async def test_state_changed_elsewhere_is_not_trusted():
+    msg = FakeMessage()
+    await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(1))
+    # another replica edited the message; the update now carries its keyboard
+    msg.text = msg.html_text = "elsewhere"
+    msg.reply_markup = kb(3)
+
+    assert await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(1)) == "text"
+
+
+@pytest.mark.asyncio
+async def test_not_modified_from_telegram_counts_as_skipped():
+    msg = FakeMessage(not_modified=True)
+
+    assert await message_edit.edit_text_if_changed(msg, "menu", reply_markup=kb(1)) == "skipped"
+    assert message_edit.edit_stats()["not_modified"] >= 1
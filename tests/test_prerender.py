@@ -0,0 +1,49 @@
+import pytest
+
+from src.content.models import Content, SyncStats
+from src.content.renderer import LEAF_MAX_LEN, RENDER_VERSION, build_breadcrumb_text
+from src.content.sync.pipeline import prerender
+
+
+def fake(id_: int, parent_id: int | None, title: str, body: str | None = None) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=title, body=body, ord=0,
+                   text_digest=f"dg{id_}", embedded_at=None)
+
+
+@pytest.mark.asyncio
+async def test_only_changed_leaves_are_rendered(monkeypatch):
+    rows = [
+        fake(1, None, "Spain"),
+        fake(2, 1, "Visa", "<b>Schengen</b> #visa"),
+        fake(3, 1, "Food", "Paella"),
+        fake(4, 1, "Rent", "Flats"),
+    ]
+    unchanged = ("dg3", LEAF_MAX_LEN, RENDER_VERSION, build_breadcrumb_text([rows[0], rows[2]]))
+    old_renderer = (
+        "dg4", LEAF_MAX_LEN, RENDER_VERSION - 1, build_breadcrumb_text([rows[0], rows[3]])
+    )
+    written, deleted = [], []
+
+    async def list_all_content():
+        return rows
+
+    async def list_rendered_keys():
+        return {1: ("dg1", LEAF_MAX_LEN, RENDER_VERSION, "Spain"), 3: unchanged, 4: old_renderer}
+
+    async def upsert_rendered_leaves(leaves):
+        written.extend(leaves)
+
+    async def delete_rendered(ids):
+        deleted.extend(ids)
+
+    for fn in (list_all_content, list_rendered_keys, upsert_rendered_leaves, delete_rendered):
+        monkeypatch.setattr(prerender.repository, fn.__name__, fn)
+
+    stats = SyncStats()
+    await prerender.prerender_leaves(stats)
+
+    assert deleted == [1]  # category, not a leaf any more
+    assert [r.content_id for r in written] == [2, 4]  # 4: stored by an older renderer
+    assert written[0].complete_text == "<b>Spain › Visa</b>\n\n<b>Schengen</b>"
+    assert {r.render_version for r in written} == {RENDER_VERSION}
+    assert stats.rendered == 2
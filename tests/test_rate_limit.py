@@ -0,0 +1,38 @@
+import pytest
+
+from src.tools.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, timer=clock)
+
+    assert [bucket.reserve() for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    assert not bucket.idle()
+
+    clock.now = 10
+    assert bucket.idle()
+    assert bucket.reserve() == 0
+
+
+def test_pause_delays_the_next_slot():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=2, timer=clock)
+
+    bucket.pause(7)
+
+    assert bucket.reserve() == 7
+    assert bucket.reserve() == 8
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
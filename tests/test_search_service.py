@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from src.bot import search_service
+from src.content.models import Content
+
+
+def fake(id_: int) -> Content:
+    return Content(id=id_, parent_id=None, title=str(id_), body="x", ord=0, text_digest="",
+                   embedded_at=None)
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fts = [(1, 9.0), (2, 5.0), (3, 1.0)]
+    vector = [(2, 0.9), (3, 0.8), (4, 0.7)]
+    fused = search_service.fuse_rankings([fts, vector])
+
+    assert [doc_id for doc_id, _ in fused] == [2, 3, 1, 4]
+    assert search_service.fuse_rankings([fts]) == [
+        (1, 1 / 61), (2, 1 / 62), (3, 1 / 63)
+    ]
+    assert search_service.fuse_rankings([]) == []
+
+
+@pytest.fixture()
+def backends(monkeypatch):
+    async def get_contents_many_cached(ids):
+        return [fake(i) for i in ids], []
+
+    monkeypatch.setattr(search_service, "get_contents_many_cached", get_contents_many_cached)
+    monkeypatch.setattr(search_service.settings, "SEARCH_BUDGET_SECONDS", 0.05)
+
+    def use(fts, vector):
+        monkeypatch.setattr(search_service, "search_fts", fts)
+        monkeypatch.setattr(search_service, "_search_vector", vector)
+
+    return use
+
+
+async def _ids(query="виза"):
+    return [item.id async for item, _score in search_service._search_hybrid(query, top_k=3)]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_fuses_both_backends(backends):
+    async def fts(query, limit):
+        return [(1, 1.0), (2, 0.5)]
+
+    async def vector(query, limit):
+        return [(2, 0.9), (5, 0.8)]
+
+    backends(fts, vector)
+    assert await _ids() == [2, 1, 5]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_degrades_to_the_backend_that_answers(backends):
+    async def fts_down(query, limit):
+        raise ConnectionError("pool closed")
+
+    unwound = []
+
+    async def vector_slow(query, limit):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            unwound.append(query)  # e.g. a pool connection going back
+        return [(9, 1.0)]
+
+    async def fts(query, limit):
+        return [(1, 1.0), (2, 0.5)]
+
+    async def vector(query, limit):
+        return [(5, 0.8)]
+
+    backends(fts_down, vector)
+    assert await _ids() == [5]
+    backends(fts, vector_slow)
+    assert await _ids() == [1, 2]
+    assert unwound == ["виза"]  # cancelled and awaited before results are yielded
+    backends(fts_down, vector_slow)
+    assert await _ids() == []
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    AnswerCallbackQuery,
+    DeleteMessage,
+    EditMessageText,
+    SendChatAction,
+    SendMessage,
+)
+
+from src.bot.send_scheduler import SendScheduler
+
+
+def scheduler(**overrides) -> SendScheduler:
+    params = dict(
+        global_per_second=1000, chat_per_second=1000, chat_burst=10, group_per_minute=60_000
+    )
+    params.update(overrides)
+    return SendScheduler(**params)
+
+
+@pytest.mark.asyncio
+async def test_messages_of_one_chat_keep_their_order():
+    sent = []
+
+    async def make_request(bot, method):
+        await asyncio.sleep(0.01 if method.text == "1" else 0)  # the first one is slow
+        sent.append((method.chat_id, method.text))
+        return method.text
+
+    s = scheduler()
+    calls = [s(make_request, None, SendMessage(chat_id=1, text=str(i))) for i in range(1, 4)]
+    assert await asyncio.gather(*calls) == ["1", "2", "3"]
+
+    assert sent == [(1, "1"), (1, "2"), (1, "3")]
+    assert s.stats()["sent"] == 3
+    assert s.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_then_retried():
+    attempts = []
+
+    async def make_request(bot, method):
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0.05)
+        return "ok"
+
+    s = scheduler()
+    assert await s(make_request, None, SendMessage(chat_id=1, text="x")) == "ok"
+
+    assert attempts[1] - attempts[0] >= 0.045
+    assert s.stats()["retried"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries_and_passes_chatless_calls_through():
+    async def always_429(bot, method):
+        raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+
+    s = scheduler(max_retries=2)
+    with pytest.raises(TelegramRetryAfter):
+        await s(always_429, None, SendMessage(chat_id=-100, text="x"))
+    assert (s.stats()["retried"], s.stats()["gave_up"]) == (2, 1)
+
+    async def make_request(bot, method):
+        return "answered"
+
+    assert await s(make_request, None, AnswerCallbackQuery(callback_query_id="1")) == "answered"
+    assert s.stats()["chats"] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_message_sends_are_paced_but_every_call_is_retried():
+    async def make_request(bot, method):
+        return "ok"
+
+    s = scheduler(group_per_minute=1)  # a group chat: one send, then a minute's wait
+    assert await s(make_request, None, SendMessage(chat_id=-100, text="x")) == "ok"
+
+    # navigation does not wait behind the group bucket
+    edits = [
+        EditMessageText(chat_id=-100, message_id=1, text="menu"),
+        DeleteMessage(chat_id=-100, message_id=1),
+        SendChatAction(chat_id=-100, action="typing"),
+    ]
+    results = await asyncio.wait_for(asyncio.gather(*(s(make_request, None, m) for m in edits)), 1)
+    assert results == ["ok"] * 3
+
+    calls = []
+
+    async def once_429(bot, method):
+        calls.append(method)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+        return "edited"
+
+    assert await s(once_429, None, EditMessageText(chat_id=1, message_id=1, text="x")) == "edited"
+    assert len(calls) == 2 and s.stats()["retried"] == 1
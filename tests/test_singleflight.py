@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from src.tools.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_load():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    waiters = [asyncio.create_task(flight.do("k", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert calls == 1
+    assert flight.loads == 1
+    assert flight.coalesced == 4
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_load_does_not_poison_later_callers():
+    flight = SingleFlight()
+
+    async def broken():
+        raise RuntimeError("db down")
+
+    async def healthy():
+        return 42
+
+    with pytest.raises(RuntimeError):
+        await flight.do("k", broken)
+
+    assert await flight.do("k", healthy) == 42
+    assert flight.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_load():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def loader():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", loader))
+    second = asyncio.create_task(flight.do("k", loader))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "done"
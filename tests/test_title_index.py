@@ -0,0 +1,40 @@
+from src.bot.content_tree import ContentTree
+from src.bot.title_index import TitleIndex
+from src.content.models import Content
+
+
+def fake(id_: int, parent_id: int | None, title: str) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=title, body=None, ord=0, text_digest="",
+                   embedded_at=None)
+
+
+def index() -> TitleIndex:
+    rows = [
+        fake(1, None, "Испания"),
+        fake(2, 1, "Виза в Испанию"),
+        fake(3, 1, "<b>Ёда</b> и напитки"),
+        fake(4, None, "Португалия"),
+        fake(5, 4, "Транспорт"),
+        fake(6, 1, "Транспорт и такси по всей стране, включая острова и побережье"),
+    ]
+    return TitleIndex(ContentTree.build(rows, generation=3))
+
+
+def test_prefix_word_and_substring_matches_are_ranked():
+    hits = index().search("исп")
+    assert [h.id for h in hits] == [1, 2]  # title prefix before a word inside the title
+    assert hits[1].breadcrumb == "Испания"
+
+    assert [h.id for h in index().search("ания")] == [1]  # inside a word
+    assert [h.id for h in index().search("  ЕДА ")] == [3]  # case, ё and spaces are normalised
+    assert index().search("еда")[0].title == "Ёда и напитки"
+
+
+def test_long_queries_and_misses():
+    ix = index()
+    assert [h.id for h in ix.search("транспорт")] == [5, 6]
+    assert [h.id for h in ix.search("транспорт и такси по всей стране, включая")] == [6]
+    assert [h.id for h in ix.search("такси по всей стране, включая острова и побережье")] == [6]
+    assert ix.search("такси по всей стране, включая остров и") == []
+    assert ix.search("") == []
+    assert len(ix.search("а", limit=2)) == 2
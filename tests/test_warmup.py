@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from src.bot import warmup
+from src.content.models import ChildrenPage, Content
+
+
+def fake(id_: int, parent_id: int | None) -> Content:
+    return Content(id=id_, parent_id=parent_id, title=str(id_), body="x", ord=0, text_digest="",
+                   embedded_at=None)
+
+
+@pytest.fixture()
+def fake_content(monkeypatch):
+    nodes = {1: fake(1, None), 2: fake(2, 1), 3: fake(3, 1)}
+    rendered = []
+
+    async def top_opened_content_ids(*, window_hours, limit):
+        return [(2, 50), (1, 10), (99, 3)][:limit]
+
+    async def get_content_cached(item_id):
+        return nodes.get(item_id)
+
+    async def get_breadcrumb_cached(item_id):
+        return [nodes[1], nodes[item_id]] if item_id != 1 else [nodes[1]]
+
+    async def get_contents_many_cached(item_ids):
+        return [nodes[i] for i in item_ids if i in nodes], [i for i in item_ids if i not in nodes]
+
+    async def get_breadcrumbs_many_cached(item_ids):
+        return {i: await get_breadcrumb_cached(i) for i in item_ids if i in nodes}
+
+    async def get_children_cached(parent_id):
+        return [n for n in nodes.values() if n.parent_id == parent_id]
+
+    async def get_children_page_cached(parent_id, page):
+        return ChildrenPage(await get_children_cached(parent_id))
+
+    async def render_leaf_message_cached(item, breadcrumb_items):
+        rendered.append(item.id)
+        return "text", []
+
+    for fn in (top_opened_content_ids, get_content_cached, get_breadcrumb_cached,
+               get_contents_many_cached, get_breadcrumbs_many_cached, get_children_cached,
+               get_children_page_cached, render_leaf_message_cached):
+        monkeypatch.setattr(warmup, fn.__name__, fn)
+    return rendered
+
+
+@pytest.mark.asyncio
+async def test_warm_up_reports_what_was_loaded(fake_content):
+    report = await warmup.warm_up(top_n=10, window_hours=24, budget_s=5)
+
+    assert report.requested == 3
+    assert (report.categories, report.leaves, report.missing) == (1, 1, 1)
+    assert fake_content == [2]
+    assert not report.timed_out
+
+
+@pytest.mark.asyncio
+async def test_warm_up_stops_at_time_budget(fake_content, monkeypatch):
+    async def slow_render(item, breadcrumb_items):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(warmup, "render_leaf_message_cached", slow_render)
+    report = await warmup.warm_up(top_n=10, window_hours=24, budget_s=0.05)
+
+    assert report.timed_out
+    assert report.leaves == 0
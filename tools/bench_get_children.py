@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: rows/sec of `get_children` on a large category.
+
+Seeds a temporary category with N children into the database from POSTGRES_URL, then compares
+the old decoding (`Content(**record)`) with the current `get_children` (`Content(*record)`).
+Both run the same query text, so both hit asyncpg's per-connection statement cache — the
+difference is decoding only. Decoding alone is also measured separately. The seeded rows are
+deleted afterwards.
+
+    python tools/bench_get_children.py --children 2000 --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.bot.content_dao import _SEL, get_children  # noqa: E402
+from src.content.models import Content  # noqa: E402
+from src.tools.db import execute, fetch, fetchrow  # noqa: E402
+
+
+async def _kwargs_get_children(parent: int | None) -> list[Content]:
+    rows = await fetch(
+        f"SELECT {_SEL} FROM content "
+        "WHERE parent_id IS NOT DISTINCT FROM $1 "
+        "ORDER BY ord, id;",
+        parent,
+    )
+    return [Content(**r) for r in rows]
+
+
+async def _seed(n: int, body_len: int) -> int:
+    row = await fetchrow("INSERT INTO content (title) VALUES ('bench root') RETURNING id;")
+    parent = row["id"]
+    await execute(
+        "INSERT INTO content (parent_id, title, body, ord) "
+        "SELECT $1, 'bench child ' || g, repeat('x', $3), g FROM generate_series(1, $2) g;",
+        parent,
+        n,
+        body_len,
+    )
+    return parent
+
+
+def _rate(rows: int, seconds: float) -> str:
+    return f"{rows / seconds:>12,.0f} rows/s"
+
+
+async def main(n: int, rounds: int, body_len: int) -> None:
+    parent = await _seed(n, body_len)
+    try:
+        for fn in (_kwargs_get_children, get_children):  # warm the statement cache
+            await fn(parent)
+
+        for label, fn in (("kwargs    ", _kwargs_get_children), ("positional", get_children)):
+            t0 = perf_counter()
+            for _ in range(rounds):
+                await fn(parent)
+            print(f"get_children {label} {_rate(n * rounds, perf_counter() - t0)}")
+
+        records = await fetch(f"SELECT {_SEL} FROM content WHERE parent_id = $1;", parent)
+        for label, decode in (
+            ("Content(**r)", lambda r: Content(**r)),
+            ("Content(*r) ", lambda r: Content(*r)),
+        ):
+            t0 = perf_counter()
+            for _ in range(rounds):
+                [decode(r) for r in records]
+            print(f"decode {label}  {_rate(n * rounds, perf_counter() - t0)}")
+    finally:
+        await execute("DELETE FROM content WHERE id = $1 OR parent_id = $1;", parent)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--children", type=int, default=2000)
+    ap.add_argument("--rounds", type=int, default=50)
+    ap.add_argument("--body-len", type=int, default=2000)
+    args = ap.parse_args()
+    asyncio.run(main(args.children, args.rounds, args.body_len))
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: leaf rendering of a long article, legacy chain vs the single-pass pipeline.
+
+The legacy chain is bleach → is_balanced → split_html_safe → hashtag regexes per chunk →
+_first_chunk_with_fallback; `render_leaf_message` validates the body in one walk and reuses it
+for splitting (`html_chunks`). Both outputs are compared before timing. No database needed.
+
+    python tools/bench_render.py --paragraphs 2000 --rounds 20
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.content.models import Content  # noqa: E402
+from src.content.renderer import (  # noqa: E402
+    LEAF_MAX_LEN,
+    _render_legacy,
+    build_breadcrumb_text,
+    render_leaf_message,
+)
+
+
+def _article(paragraphs: int, seed: int = 7) -> str:
+    """Google Docs-shaped body: escaped text runs inside b/i/u/s/a wrappers, a few hashtags."""
+    rnd = random.Random(seed)
+    words = ["Испания", "виза", "NIE", "&quot;Padrón&quot;", "5&nbsp;€", "🇪🇸", "Tom &amp; Jerry",
+             "город", "аренда", "#виза", "—"]
+    lines = []
+    for _ in range(paragraphs):
+        runs = []
+        for _ in range(rnd.randint(1, 5)):
+            txt = " ".join(rnd.choice(words) for _ in range(rnd.randint(3, 30)))
+            if rnd.random() < 0.2:
+                txt = f"<b>{txt}</b>"
+            if rnd.random() < 0.05:
+                txt = f'<a href="https://example.com/{rnd.randint(1, 99)}">{txt}</a>'
+            runs.append(txt + " ")
+        lines.append("".join(runs).rstrip())
+    return "\n".join(lines)
+
+
+def main(paragraphs: int, rounds: int) -> None:
+    body = _article(paragraphs)
+    crumbs = [
+        Content(id=1, parent_id=None, title="Испания", body=None, ord=0, text_digest="",
+                embedded_at=None),
+        Content(id=2, parent_id=1, title="Документы", body=body, ord=0, text_digest="",
+                embedded_at=None),
+    ]
+    breadcrumb_text = build_breadcrumb_text(crumbs)
+    legacy = _render_legacy(breadcrumb_text, body, LEAF_MAX_LEN)
+    assert render_leaf_message(crumbs[1], crumbs) == legacy
+
+    print(f"body: {len(body):,} chars")
+    for label, fn in (
+        ("legacy     ", lambda: _render_legacy(breadcrumb_text, body, LEAF_MAX_LEN)),
+        ("single-pass", lambda: render_leaf_message(crumbs[1], crumbs)),
+    ):
+        t0 = perf_counter()
+        for _ in range(rounds):
+            fn()
+        dt = (perf_counter() - t0) / rounds
+        print(f"{label} {dt * 1000:>9.2f} ms/render  {len(body) / dt / 1e6:>7.2f} Mchar/s")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--paragraphs", type=int, default=2000)
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    from loguru import logger
+
+    logger.remove()  # render_leaf_message logs the breadcrumb on every call
+    main(args.paragraphs, args.rounds)